@@ -0,0 +1,203 @@
+"""
+Бенчмарк пути печати: от файла шаблона до байтов на RAW-порту принтера
+
+Замеряется тот же путь, что и при прямой печати из программы (utils.direct_print): загрузка,
+масштабирование, перевод в 1 бит, кодирование ZPL, запись в спул и отправка пачками с
+подтверждением через пул на локальный фиктивный принтер. Результаты сохраняются в JSON,
+с ключом --compare выполняется сравнение с предыдущим прогоном.
+
+Пример:
+    python benchmarks/bench_print.py --dpi 203 300 600 --batch 1 50 1000 --output bench.json
+    python benchmarks/bench_print.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR, Qt
+from PyQt5.QtGui import QGuiApplication
+from loguru import logger
+
+from utils.bitops import NO_ORIENTATION, invert_bitmap
+from utils.direct_print import attach_bitmap, encode_labels, render_page, submit_job
+from utils.fake_printer import FakePrinterServer
+from utils.job_log import PrintJob
+from utils.pool import PrinterPool
+from utils.prerender import RenderedLabel
+from utils.render import Bitmap, LabelParams
+from utils.spool import PrintSpool
+from utils.utils import IMAGE_EXTENSIONS
+
+STAGES = ("load", "scale", "convert", "encode", "spool", "send")
+
+
+def list_templates(templates_dir):
+    return sorted(
+        os.path.join(templates_dir, name)
+        for name in os.listdir(templates_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def render_qt(path, params, job):
+    return attach_bitmap(render_page(path, params, job), params, job)
+
+
+def render_pil(path, params, job):
+    from PIL import Image
+
+    with job.stage("load"):
+        with Image.open(path) as img:
+            image = img.convert("L")
+    with job.stage("scale"):
+        label = image.resize(params.target_size_px, Image.LANCZOS)
+    with job.stage("convert"):
+        mono = label.convert("1")
+        width, height = mono.size
+        # В режиме '1' у PIL единица - белая точка, у принтера - черная; биты выравнивания остаются белыми
+        bitmap = invert_bitmap(Bitmap(mono.tobytes(), width, height, (width + 7) // 8))
+    return RenderedLabel(None, bitmap)
+
+
+class DirectPrinter:
+    """Фиктивный принтер за пулом из одного принтера и спул во временной папке, как в программе"""
+
+    def __init__(self, server, spool_dir):
+        self.spool = PrintSpool(spool_dir)
+        self.sender = PrinterPool("bench", {"bench": server.address})
+        self._done = threading.Event()
+        self._result = None
+        # Сигналы принимаются прямо в потоке отправки: цикла событий у бенчмарка нет
+        self.sender.job_finished.connect(self._on_finished, Qt.DirectConnection)
+        self.sender.job_failed.connect(self._on_failed, Qt.DirectConnection)
+
+    def _on_finished(self, job, send_ms):
+        self._result = (send_ms, None)
+        self._done.set()
+
+    def _on_failed(self, job, error):
+        self._result = (None, error)
+        self._done.set()
+
+    def print(self, payloads, job):
+        """Спул и отправка, как print_raw; ждёт подтверждения всех этикеток принтером"""
+        self._done.clear()
+        entry = submit_job(self.spool, self.sender, "bench", payloads, job)
+        self._done.wait()
+        send_ms, error = self._result
+        if error is not None:
+            raise RuntimeError(error)
+        job.add_stage("send", send_ms)
+        self.spool.complete(entry)
+
+
+def run_case(backend, templates, dpi, batch_size, printer):
+    params = LabelParams(100, 75, 0, 0, dpi, False)
+    render = render_pil if backend == "pil" else render_qt
+    job = PrintJob("bench", params, 1)
+    job.record["template"] = os.path.basename(templates[0])
+
+    started = time.perf_counter()
+    labels = [render(templates[i % len(templates)], params, job) for i in range(batch_size)]
+    payloads = encode_labels(labels, "zpl", params, 1, None, NO_ORIENTATION, job)
+    printer.print(payloads, job)
+    total_ms = (time.perf_counter() - started) * 1000
+
+    stages = job.record["stages_ms"]
+    return {
+        "backend": backend,
+        "dpi": dpi,
+        "batch": batch_size,
+        "stages_ms": {stage: round(stages.get(stage, 0.0), 3) for stage in STAGES},
+        "total_ms": round(total_ms, 3),
+        "per_label_ms": round(total_ms / batch_size, 3),
+        "labels_per_s": round(batch_size / (total_ms / 1000), 2),
+        "payload_bytes": job.record["payload_bytes"],
+    }
+
+
+def case_key(result):
+    return result["backend"], result["dpi"], result["batch"]
+
+
+def compare(results, baseline_path, threshold):
+    """Сравнивает время на этикетку с предыдущим прогоном, возвращает число регрессий"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+
+    regressions = 0
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if previous is None:
+            continue
+        change = (result["per_label_ms"] - previous["per_label_ms"]) / previous["per_label_ms"] * 100
+        mark = ""
+        if change > threshold:
+            mark = "  <-- РЕГРЕССИЯ"
+            regressions += 1
+        print(f"{result['backend']:>3} {result['dpi']:>4} dpi x{result['batch']:<5} "
+              f"{previous['per_label_ms']:9.2f} -> {result['per_label_ms']:9.2f} мс/этикетка ({change:+.1f}%){mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк рендеринга и отправки этикеток")
+    parser.add_argument("--templates", default=os.path.join(ROOT_DIR, "templates"))
+    parser.add_argument("--dpi", type=int, nargs="+", default=[203, 300, 600])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 50, 1000])
+    parser.add_argument("--backend", nargs="+", choices=["qt", "pil"], default=["qt"])
+    parser.add_argument("--output", help="Файл для сохранения результатов (JSON)")
+    parser.add_argument("--compare", help="Файл с результатами предыдущего прогона")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимое замедление, %%")
+    args = parser.parse_args()
+
+    # Отладочные сообщения транспорта искажают замеры
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+    app = QGuiApplication(sys.argv[:1])
+    templates = list_templates(args.templates)
+    if not templates:
+        parser.error(f"Нет шаблонов в папке {args.templates}")
+
+    results = []
+    with FakePrinterServer() as server, tempfile.TemporaryDirectory() as spool_dir:
+        printer = DirectPrinter(server, spool_dir)
+        for backend in args.backend:
+            for dpi in args.dpi:
+                for batch_size in args.batch:
+                    result = run_case(backend, templates, dpi, batch_size, printer)
+                    results.append(result)
+                    stages = " ".join(f"{stage} {result['stages_ms'][stage]:.0f}" for stage in STAGES)
+                    print(f"{backend:>3} {dpi:>4} dpi x{batch_size:<5} {result['per_label_ms']:9.2f} мс/этикетка "
+                          f"{result['labels_per_s']:8.1f} эт/с  [{stages}]")
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "templates": len(templates),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else 0
+    del app
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
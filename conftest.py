@@ -0,0 +1,14 @@
+"""Общие настройки тестов: корень репозитория в sys.path (модули utils.*) и Qt без дисплея"""
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    yield app
@@ -3,17 +3,44 @@ import os
 import sys
 import time
 
-from PyQt5.QtCore import Qt, QSizeF, QRect
+# Отметка начала запуска, чтобы в отчёте учесть время импорта Qt
+IMPORT_STARTED = time.perf_counter()
+
+from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QTimer
 from PyQt5.QtGui import QPixmap, QImage, QPainter, QIcon, QMouseEvent, QFontMetrics, QFont
-from PyQt5.QtPrintSupport import QPrinter, QPrinterInfo
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton,
                              QListWidget, QLabel, QComboBox, QDoubleSpinBox, QFileDialog,
                              QWidget, QMessageBox, QGroupBox, QSpinBox, QSplitter, QScrollArea, QGridLayout,
-                             QRadioButton, QButtonGroup, QCheckBox, QTextEdit, QFontComboBox, QDialog)
+                             QRadioButton, QButtonGroup, QCheckBox, QTextEdit, QFontComboBox, QDialog,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QListWidgetItem, QInputDialog)
 from loguru import logger
 
 from styles import apply_styles, setup_button_styles
-from utils.utils import get_resource_path
+from utils.bitops import Orientation, ROTATIONS, split_orientation
+from utils.content_cache import ContentCache
+from utils.direct_print import attach_bitmap, encode_labels, render_page, submit_job
+from utils.encoders import DEFAULT_ENCODER, ENCODERS, ZPL_ORIENTATION
+from utils.image_loader import ImageLoadError, load_image
+from utils.importer import ImageImporter, ThumbnailLoader
+from utils.job_log import JobLog, PrintJob
+from utils.journal import PrintJournal, format_job_time
+from utils.label_doc import LabelDocument, TextElement, render_document
+from utils.pool import PrinterPool
+from utils.prerender import Prerenderer, RenderedLabel
+from utils.presets import MediaPreset, PresetStore
+from utils.print_session import PrintSessionManager
+from utils.printers import PrinterCache, PrinterDiscoveryThread
+from utils.profiling import profiled
+from utils.render import LabelParams, orient_page
+from utils.settings import load_settings, update_settings
+from utils.spool import PrintSpool, SpoolEntry
+from utils.startup import IdleTaskQueue, StartupProfiler
+from utils.template_pack import TemplatePack
+from utils.utils import IMAGE_EXTENSIONS, THUMBNAIL_SIZE, get_resource_path
+from utils.watchdog import StallWatchdog
+
+# Векторный документ этикетки (LabelDocument) у элемента списка изображений
+LABEL_DOCUMENT_ROLE = Qt.UserRole + 1
 
 
 class ClickableLabel(QLabel):
@@ -93,6 +120,7 @@ class TextPrintDialog(QDialog):
         button_layout.addWidget(self.cancel_btn)
         layout.addLayout(button_layout)
 
+    @profiled
     def create_text_image(self):
         """Создание изображения с текстом"""
         text = self.text_edit.toPlainText().strip()
@@ -105,15 +133,14 @@ class TextPrintDialog(QDialog):
         width_mm = self.parent_window.width_spin.value()
         height_mm = self.parent_window.height_spin.value()
         dpi = int(self.parent_window.dpi_spin.value())
+        margin_mm = 10  # Отступ 10 мм
 
         # Преобразуем мм в пиксели
         width_px = int(width_mm * dpi / 25.4)
         height_px = int(height_mm * dpi / 25.4)
 
-        # Создаем изображение
-        image = QImage(width_px, height_px, QImage.Format_ARGB32)
-        image.fill(Qt.white)
-
+        # Размер шрифта подбирается на изображении этикетки, чтобы метрики были в точках принтера
+        image = QImage(width_px, height_px, QImage.Format_Grayscale8)
         painter = QPainter(image)
 
         # Настройки шрифта
@@ -123,18 +150,22 @@ class TextPrintDialog(QDialog):
         painter.setFont(font)
 
         # Параметры для расчета переноса строк
-        margin = int(10 * dpi / 25.4)  # Отступ 10 мм
+        margin = int(margin_mm * dpi / 25.4)
         text_rect = QRect(margin, margin,
                           width_px - 2 * margin,
                           height_px - 2 * margin)
 
         # Автоподбор размера шрифта
         self.adjust_font_size(painter, text, text_rect)
-
-        # Рисуем текст с переносом по словам
-        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, text)
+        font_height_mm = painter.fontInfo().pixelSize() * 25.4 / dpi
         painter.end()
 
+        # Этикетка как документ: Zebra напечатает текст своим шрифтом, остальным принтерам уйдёт растр
+        document = LabelDocument(width_mm, height_mm)
+        document.add(TextElement(margin_mm, margin_mm, width_mm - 2 * margin_mm, height_mm - 2 * margin_mm, text,
+                                 font_height_mm, self.bold_checkbox.isChecked(), font.family()))
+        image = render_document(document, dpi)
+
         # Сохраняем временное изображение
         temp_dir = os.path.join(os.path.expanduser("~"), ".image_printer_temp")
         os.makedirs(temp_dir, exist_ok=True)
@@ -142,7 +173,9 @@ class TextPrintDialog(QDialog):
 
         if image.save(temp_file, "PNG"):
             # Добавляем в список изображений
-            self.parent_window.images_list.addItem(temp_file)
+            item = QListWidgetItem(temp_file)
+            item.setData(LABEL_DOCUMENT_ROLE, document)
+            self.parent_window.images_list.addItem(item)
             self.parent_window.images_list.setCurrentRow(self.parent_window.images_list.count() - 1)
             self.accept()
         else:
@@ -185,20 +218,241 @@ class TextPrintDialog(QDialog):
                 break
 
 
+class JobStatsDialog(QDialog):
+    """Статистика заданий печати по принтерам: p50/p95 и скорость печати"""
+
+    COLUMNS = ["Принтер", "Заданий", "Этикеток", "p50, мс", "p95, мс", "Этикеток/мин"]
+
+    def __init__(self, job_log, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Статистика печати")
+        self.resize(700, 300)
+        self.job_log = job_log
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Обновить")
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.close_btn = QPushButton("Закрыть")
+        self.close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.refresh_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """Пересчёт статистики по журналу заданий"""
+        self.job_log.load_history()
+        stats = self.job_log.stats()
+
+        self.table.setRowCount(len(stats))
+        for row, printer_stats in enumerate(stats):
+            values = [
+                printer_stats["printer"],
+                str(printer_stats["jobs"]),
+                str(printer_stats["labels"]),
+                f"{printer_stats['p50_ms']:.0f}",
+                f"{printer_stats['p95_ms']:.0f}",
+                f"{printer_stats['labels_per_min']:.1f}",
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+
+class HistoryDialog(QDialog):
+    """История заданий печати с повторной печатью сохранённых команд"""
+
+    COLUMNS = ["Время", "Принтер", "Шаблон", "Этикеток", "Копий"]
+    ALL = "Все"
+
+    def __init__(self, journal, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("История печати")
+        self.resize(800, 450)
+        self.journal = journal
+        self.parent_window = parent
+        self.jobs = []
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Принтер:"))
+        self.printer_filter = QComboBox()
+        self.printer_filter.addItems([self.ALL] + self.journal.distinct_values("printer"))
+        self.printer_filter.currentTextChanged.connect(self.refresh)
+        filter_layout.addWidget(self.printer_filter)
+
+        filter_layout.addWidget(QLabel("Шаблон:"))
+        self.template_filter = QComboBox()
+        self.template_filter.addItems([self.ALL] + self.journal.distinct_values("template"))
+        self.template_filter.currentTextChanged.connect(self.refresh)
+        filter_layout.addWidget(self.template_filter)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.itemSelectionChanged.connect(self.update_reprint_button)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.reprint_btn = QPushButton("Повторить печать")
+        self.reprint_btn.setEnabled(False)
+        self.reprint_btn.clicked.connect(self.reprint_selected)
+        self.close_btn = QPushButton("Закрыть")
+        self.close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.reprint_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        printer = self.printer_filter.currentText()
+        template = self.template_filter.currentText()
+        self.jobs = self.journal.find(
+            printer=None if printer == self.ALL else printer,
+            template=None if template == self.ALL else template,
+        )
+
+        self.table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            values = [format_job_time(job["ts"]), job["printer"], job["template"] or "",
+                      str(job["labels"]), str(job["copies"])]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.update_reprint_button()
+
+    def selected_job(self):
+        rows = self.table.selectionModel().selectedRows()
+        return self.jobs[rows[0].row()] if rows else None
+
+    def update_reprint_button(self):
+        job = self.selected_job()
+        # Повтор без рендеринга возможен только для заданий с сохранёнными командами принтера
+        self.reprint_btn.setEnabled(job is not None and job["has_payload"])
+
+    def reprint_selected(self):
+        job = self.selected_job()
+        if job is not None:
+            self.parent_window.reprint_job(job)
+
 
 class PrintApp(QMainWindow):
-    def __init__(self):
+    # Прогрев кэша при запуске: сколько самых частых шаблонов и за какой период истории
+    WARM_TEMPLATES = 8
+    WARM_HISTORY_DAYS = 30
+
+    def __init__(self, startup_profiler=None):
         super().__init__()
+        self.startup_profiler = startup_profiler or StartupProfiler()
         self.setWindowTitle("Image Printer")
         self.setGeometry(100, 100, 1800, 700)  # Увеличиваем ширину для новой панели
-        self.setWindowOpacity(0.99)
+        # Прозрачность включает композитное (layered) окно и замедляет перерисовку, поэтому только по настройке
+        settings = load_settings()
+        try:
+            window_opacity = float(settings.get("window_opacity", 1.0))
+        except (TypeError, ValueError):
+            logger.warning(f"Неверное значение window_opacity в настройках: {settings.get('window_opacity')!r}")
+            window_opacity = 1.0
+        if window_opacity < 1.0:
+            self.setWindowOpacity(window_opacity)
+        # Сетевые принтеры, которым этикетка отправляется напрямую в ZPL: {"имя": "хост:порт"}
+        self.raw_printers = settings.get("raw_printers", {})
+        # Язык команд для сетевых принтеров и пулов: zpl, epl, tspl, escpos
+        self.printer_backends = settings.get("printer_backends", {})
+        # Пулы одинаковых сетевых принтеров: {"имя пула": ["принтер 1", "принтер 2"]}
+        self.printer_pools = {}
+        for pool_name, members in settings.get("printer_pools", {}).items():
+            pool = PrinterPool(pool_name, {name: self.raw_printers[name] for name in members
+                                           if name in self.raw_printers}, self)
+            pool.job_finished.connect(self.on_pool_job_finished)
+            pool.job_failed.connect(self.on_pool_job_failed)
+            self.printer_pools[pool_name] = pool
+        # Одиночные сетевые принтеры отправляют этикетки так же, как пулы: в своём потоке, не в GUI
+        self.direct_senders = {}
+        for printer_name, address in self.raw_printers.items():
+            sender = PrinterPool(printer_name, {printer_name: address}, self)
+            sender.job_finished.connect(self.on_pool_job_finished)
+            sender.job_failed.connect(self.on_pool_job_failed)
+            self.direct_senders[printer_name] = sender
+        # Пресеты носителя по принтерам; применяются при выборе принтера
+        self.presets = PresetStore()
+        self.presets_printer = None
         self.selected_template = None
         self.template_buttons_group = QButtonGroup(self)
         self.template_buttons_group.setExclusive(True)
-        self.initUI()
-        self.background_image = QPixmap(get_resource_path("фон.jpg"))
-        self.update_printers_list()
-        self.load_templates()
+        self.printer_cache = PrinterCache()
+        self.printer_discovery = None
+        self.job_log = JobLog()
+        # Журнал, спул и дисковый кэш открываются после первой отрисовки окна (open_storage)
+        self.journal = None
+        self.spool = None
+        self.render_cache = None
+        # Общая папка кэша на сетевом диске - по настройке
+        self.shared_cache_dir = settings.get("shared_cache_dir")
+        self.print_sessions = PrintSessionManager(self.printer_cache, self)
+        self.print_sessions.jobs_spooled.connect(self.on_jobs_spooled)
+        self.prerenderer = Prerenderer(parent=self)
+        self.image_importer = ImageImporter(self)
+        self.image_importer.image_ready.connect(self.on_image_imported)
+        self.image_importer.progress.connect(self.on_import_progress)
+        self.image_importer.finished.connect(self.on_import_finished)
+        self.thumbnail_loader = ThumbnailLoader(parent=self)
+        self.thumbnail_loader.loaded.connect(self.on_thumbnail_loaded)
+        # Зависания цикла событий дольше порога пишутся в stalls.log со стеком GUI-потока
+        self.stall_watchdog = StallWatchdog(settings.get("stall_threshold_ms", 500), parent=self)
+        # Файлы и папки можно перетащить в окно
+        self.setAcceptDrops(True)
+        self.template_pack = None
+        self.print_sessions.job_finished.connect(self.on_print_job_finished)
+        self.print_sessions.job_failed.connect(self.on_print_job_failed)
+        self.background_image = None
+        self.scaled_background = None
+        with self.startup_profiler.phase("интерфейс"):
+            self.initUI()
+            # Показываем последний известный список сразу, актуальный придёт из фонового потока
+            self.update_printers_list(*self.printer_cache.load_last_known())
+
+        # Тяжёлые этапы выполняются после первой отрисовки окна
+        self.idle_tasks = IdleTaskQueue(self.startup_profiler, self)
+        self.idle_tasks.add("хранилища", self.open_storage)
+        self.idle_tasks.add("принтеры", self.refresh_printers)
+        self.idle_tasks.add("фон", self.load_background)
+        self.idle_tasks.add("шаблоны", self.load_templates)
+        self.idle_tasks.add("спул", self.resume_spool)
+        self.idle_tasks.add("кэш", lambda: self.render_cache.prune())
+        self.idle_tasks.add("watchdog", self.stall_watchdog.start)
+        self.idle_tasks.add("прогрев", self.warm_render_cache)
+        self.idle_tasks.finished.connect(self.startup_profiler.report)
+
+    def open_storage(self):
+        """
+        Журнал заданий (SQLite), спул прямой печати и дисковый кэш этикеток и миниатюр
+
+        Открываются первой отложенной задачей; если печать или история понадобились раньше -
+        при первом обращении
+        """
+        if self.journal is not None:
+            return
+        self.journal = PrintJournal()
+        self.spool = PrintSpool()
+        self.render_cache = ContentCache(shared_dir=self.shared_cache_dir)
+        self.prerenderer.cache = self.render_cache
+        self.thumbnail_loader.cache = self.render_cache
 
     def initUI(self):
         central_widget = QWidget()
@@ -221,6 +475,16 @@ class PrintApp(QMainWindow):
         self.printer_combo = QComboBox()
 
         printer_layout.addWidget(self.printer_combo)
+
+        # Язык команд для прямой печати (только для сетевых принтеров и пулов)
+        self.backend_layout = QHBoxLayout()
+        self.backend_layout.addWidget(QLabel("Язык принтера:"))
+        self.backend_combo = QComboBox()
+        for language in ENCODERS:
+            self.backend_combo.addItem(language.upper(), language)
+        self.backend_combo.currentIndexChanged.connect(self.on_backend_changed)
+        self.backend_layout.addWidget(self.backend_combo)
+        printer_layout.addLayout(self.backend_layout)
         printer_group.setLayout(printer_layout)
         left_layout.addWidget(printer_group)
 
@@ -239,6 +503,20 @@ class PrintApp(QMainWindow):
         params_group = QGroupBox("Пользовательские параметры печати")
         params_layout = QVBoxLayout()
 
+        # Пресеты носителя выбранного принтера
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("Пресет:"))
+        self.preset_combo = QComboBox()
+        self.preset_combo.activated.connect(self.on_preset_selected)
+        preset_layout.addWidget(self.preset_combo, 1)
+        self.save_preset_btn = QPushButton("Сохранить")
+        self.save_preset_btn.clicked.connect(self.save_preset)
+        preset_layout.addWidget(self.save_preset_btn)
+        self.delete_preset_btn = QPushButton("Удалить")
+        self.delete_preset_btn.clicked.connect(self.delete_preset)
+        preset_layout.addWidget(self.delete_preset_btn)
+        params_layout.addLayout(preset_layout)
+
         # Размеры изображения (в мм)
         size_layout = QHBoxLayout()
         size_layout.addWidget(QLabel("Ширина (мм):"))
@@ -287,6 +565,19 @@ class PrintApp(QMainWindow):
         self.darkness_layout.addWidget(self.darkness_spin)
         params_layout.addLayout(self.darkness_layout)
 
+        # Ориентация этикетки на ленте
+        orientation_layout = QHBoxLayout()
+        orientation_layout.addWidget(QLabel("Поворот:"))
+        self.rotation_combo = QComboBox()
+        for rotation in ROTATIONS:
+            self.rotation_combo.addItem(f"{rotation}°", rotation)
+        orientation_layout.addWidget(self.rotation_combo)
+        self.mirror_checkbox = QCheckBox("Зеркально")
+        orientation_layout.addWidget(self.mirror_checkbox)
+        self.invert_checkbox = QCheckBox("Инверсия")
+        orientation_layout.addWidget(self.invert_checkbox)
+        params_layout.addLayout(orientation_layout)
+
         # Чекбокс "Сохранить пропорции"
         self.aspect_ratio_checkbox = QCheckBox("Сохранить пропорции")
         self.aspect_ratio_checkbox.setChecked(False)
@@ -304,11 +595,23 @@ class PrintApp(QMainWindow):
         self.print_text_btn.clicked.connect(self.open_text_print_dialog)
         left_layout.addWidget(self.print_text_btn)
 
+        self.job_stats_btn = QPushButton("Статистика печати")
+        self.job_stats_btn.clicked.connect(self.open_job_stats_dialog)
+        left_layout.addWidget(self.job_stats_btn)
+
+        self.history_btn = QPushButton("История печати")
+        self.history_btn.clicked.connect(self.open_history_dialog)
+        left_layout.addWidget(self.history_btn)
+
         # Кнопки управления изображениями
         self.add_images_btn = QPushButton("Добавить изображения")
         self.add_images_btn.clicked.connect(self.add_images)
         left_layout.addWidget(self.add_images_btn)
 
+        self.add_folder_btn = QPushButton("Добавить папку")
+        self.add_folder_btn.clicked.connect(self.add_folder)
+        left_layout.addWidget(self.add_folder_btn)
+
         self.remove_image_btn = QPushButton("Удалить выбранное")
         self.remove_image_btn.clicked.connect(self.remove_selected_image)
         left_layout.addWidget(self.remove_image_btn)
@@ -323,6 +626,15 @@ class PrintApp(QMainWindow):
         self.images_list = QListWidget()
         self.images_list.setSelectionMode(QListWidget.SingleSelection)
         self.images_list.currentItemChanged.connect(self.show_preview)
+        # Одинаковая высота строк: список из тысяч файлов не пересчитывает размеры каждой строки
+        self.images_list.setUniformItemSizes(True)
+        self.images_list.setIconSize(QSize(48, 48))
+        # Миниатюры грузятся только для видимых строк, после остановки прокрутки
+        self.thumbnails_timer = QTimer(self)
+        self.thumbnails_timer.setSingleShot(True)
+        self.thumbnails_timer.setInterval(100)
+        self.thumbnails_timer.timeout.connect(self.request_visible_thumbnails)
+        self.images_list.verticalScrollBar().valueChanged.connect(self.thumbnails_timer.start)
         center_layout.addWidget(self.images_list)
 
         # Превью изображения
@@ -364,6 +676,17 @@ class PrintApp(QMainWindow):
         main_layout.addWidget(main_splitter)
 
         self.printer_combo.currentTextChanged.connect(self.update_zebra_settings_visibility)
+        self.printer_combo.currentTextChanged.connect(lambda: self.load_printer_presets())
+
+        # Предварительный рендеринг под новые настройки запускается после паузы в редактировании
+        self.prerender_timer = QTimer(self)
+        self.prerender_timer.setSingleShot(True)
+        self.prerender_timer.setInterval(150)
+        self.prerender_timer.timeout.connect(self.prerender_images)
+        for spin in (self.width_spin, self.height_spin, self.margin_left_spin, self.margin_top_spin, self.dpi_spin):
+            spin.valueChanged.connect(self.prerender_timer.start)
+        self.aspect_ratio_checkbox.stateChanged.connect(self.prerender_timer.start)
+        self.printer_combo.currentTextChanged.connect(self.prerender_timer.start)
         # Подключаем обработчик выбора шаблонов
         self.template_buttons_group.buttonClicked.connect(self.on_template_selected)
 
@@ -380,25 +703,35 @@ class PrintApp(QMainWindow):
         QShortcut(QKeySequence("Delete"), self, self.remove_selected_image)
         # Ctrl+R - обновить шаблоны
         QShortcut(QKeySequence("Ctrl+R"), self, self.load_templates)
+        # F5 - обновить список принтеров
+        QShortcut(QKeySequence("F5"), self, self.refresh_printers)
+        # Esc - отменить импорт изображений
+        QShortcut(QKeySequence("Escape"), self, self.cancel_import)
 
+    @profiled
     def load_templates(self):
         """Загрузка шаблонов из папки templates"""
+        self.open_storage()
         # Очищаем предыдущие шаблоны
         for i in reversed(range(self.templates_layout.count())):
             widget = self.templates_layout.itemAt(i).widget()
             if widget:
                 widget.setParent(None)
 
+        # Собранный пакет шаблонов (python -m utils.template_pack build) избавляет от декодирования
+        if self.template_pack is not None:
+            self.template_pack.close()
+        self.template_pack = TemplatePack.open_default()
+
         templates_dir = get_resource_path("templates")
         if not os.path.exists(templates_dir):
             os.makedirs(templates_dir)
             return
 
-        image_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.gif']
         templates = []
 
         for file in os.listdir(templates_dir):
-            if any(file.lower().endswith(ext) for ext in image_extensions):
+            if file.lower().endswith(IMAGE_EXTENSIONS):
                 templates.append(os.path.join(templates_dir, file))
 
         if not templates:
@@ -416,11 +749,21 @@ class PrintApp(QMainWindow):
             template_layout.setSpacing(5)
             template_layout.setContentsMargins(5, 5, 5, 5)
 
-            # Превью шаблона (кликабельное)
-            pixmap = QPixmap(template_path)
-            if not pixmap.isNull():
+            # Превью шаблона (кликабельное): из пакета или декодируется сразу в уменьшенном виде
+            thumbnail = self.template_pack.thumbnail(template_path) if self.template_pack else None
+            if thumbnail is None:
+                thumbnail = self.render_cache.get_thumbnail(template_path, THUMBNAIL_SIZE, shared=False)
+            if thumbnail is None:
+                try:
+                    thumbnail = load_image(template_path, (THUMBNAIL_SIZE, THUMBNAIL_SIZE)).scaled(
+                        THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    self.render_cache.put_thumbnail(template_path, THUMBNAIL_SIZE, thumbnail)
+                except ImageLoadError as e:
+                    logger.warning(str(e))
+            if thumbnail is not None:
                 # Масштабируем превью
-                scaled_pixmap = pixmap.scaled(120, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                scaled_pixmap = QPixmap.fromImage(thumbnail).scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio,
+                                                                   Qt.SmoothTransformation)
                 preview_label = ClickableLabel(template_path, self, template_widget)
                 preview_label.setPixmap(scaled_pixmap)
                 preview_label.setAlignment(Qt.AlignCenter)
@@ -466,12 +809,42 @@ class PrintApp(QMainWindow):
                 col = 0
                 row += 1
 
+    def load_background(self):
+        """Загрузка фонового изображения"""
+        self.background_image = QPixmap(get_resource_path("фон.jpg"))
+        self.scaled_background = None
+        self.update()
+
+    def get_scaled_background(self):
+        """Фон, масштабированный под текущий размер окна с учетом devicePixelRatio (кэшируется до resize)"""
+        if self.background_image is None or self.background_image.isNull():
+            return None
+
+        dpr = self.devicePixelRatioF()
+        if self.scaled_background is None or self.scaled_background.devicePixelRatioF() != dpr:
+            # Растягиваем изображение на весь фон один раз на размер окна
+            self.scaled_background = self.background_image.scaled(
+                self.size() * dpr,
+                Qt.IgnoreAspectRatio,
+                Qt.SmoothTransformation
+            )
+            self.scaled_background.setDevicePixelRatio(dpr)
+        return self.scaled_background
+
     def paintEvent(self, event):
-        painter = QPainter(self)
-        # Растягиваем изображение на весь фон
-        painter.drawPixmap(self.rect(), self.background_image)
+        background = self.get_scaled_background()
+        if background is not None:
+            painter = QPainter(self)
+            # Перерисовываем только обновляемую область без повторного масштабирования
+            painter.setClipRect(event.rect())
+            painter.drawPixmap(0, 0, background)
+            painter.end()
         super().paintEvent(event)
 
+        if self.startup_profiler.first_paint_ms is None:
+            self.startup_profiler.mark_first_paint()
+            self.idle_tasks.start()
+
     def on_template_image_clicked(self, template_path):
         """Обработка клика на изображение шаблона"""
         logger.info(f"Клик на шаблон: {template_path}")
@@ -497,6 +870,7 @@ class PrintApp(QMainWindow):
 
             # Показываем превью
             self.show_preview(self.images_list.currentItem())
+            self.prerender_images()
 
     def on_aspect_combo_changed(self, text):
         """Показывает/скрывает поля для пользовательского соотношения"""
@@ -506,9 +880,9 @@ class PrintApp(QMainWindow):
             self.custom_aspect_frame.hide()
 
     def update_zebra_settings_visibility(self):
-        """Показывает/скрывает настройки плотности для Zebra"""
+        """Показывает/скрывает настройки плотности для Zebra и выбор языка для сетевых принтеров"""
         printer_name = self.printer_combo.currentText()
-        is_zebra = "zebra" in printer_name.lower()
+        is_zebra = self.printer_supports_darkness(printer_name)
         # Получаем родительский layout и показываем/скрываем его
         if hasattr(self, 'darkness_layout'):
             for i in range(self.darkness_layout.count()):
@@ -516,6 +890,36 @@ class PrintApp(QMainWindow):
                 if widget:
                     widget.setVisible(is_zebra)
 
+        if hasattr(self, 'backend_layout'):
+            is_direct = self.is_direct_printer(printer_name)
+            for i in range(self.backend_layout.count()):
+                widget = self.backend_layout.itemAt(i).widget()
+                if widget:
+                    widget.setVisible(is_direct)
+            if is_direct:
+                self.backend_combo.blockSignals(True)
+                self.backend_combo.setCurrentIndex(self.backend_combo.findData(self.printer_backend(printer_name)))
+                self.backend_combo.blockSignals(False)
+
+    def printer_backend(self, printer_name):
+        """Язык команд принтера для прямой печати"""
+        return self.printer_backends.get(printer_name, DEFAULT_ENCODER)
+
+    def printer_supports_darkness(self, printer_name):
+        if self.is_direct_printer(printer_name):
+            return self.printer_backend(printer_name) != "escpos"
+        return "zebra" in printer_name.lower()
+
+    def on_backend_changed(self):
+        """Сохраняет выбранный язык для текущего принтера"""
+        printer_name = self.printer_combo.currentText()
+        if not self.is_direct_printer(printer_name):
+            return
+        self.printer_backends[printer_name] = self.backend_combo.currentData()
+        update_settings(printer_backends=self.printer_backends)
+        self.update_zebra_settings_visibility()
+
+    @profiled
     def show_preview(self, current_item):
         """Показывает превью выбранного изображения"""
         if current_item is None:
@@ -523,9 +927,12 @@ class PrintApp(QMainWindow):
             return
 
         image_path = current_item.text()
-        pixmap = QPixmap(image_path)
-
-        if pixmap.isNull():
+        try:
+            # Большие сканы не раскрываем целиком ради превью
+            pixmap = QPixmap.fromImage(load_image(
+                image_path, (self.preview_label.width() - 20, self.preview_label.height() - 20)))
+        except ImageLoadError as e:
+            logger.warning(str(e))
             self.preview_label.setText("Не удалось загрузить изображение")
             return
 
@@ -540,62 +947,279 @@ class PrintApp(QMainWindow):
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self.scaled_background = None
         if self.images_list.currentItem():
             self.show_preview(self.images_list.currentItem())
 
-    def update_printers_list(self):
+    def refresh_printers(self):
+        """Запуск фонового поиска принтеров"""
+        if self.printer_discovery is not None and self.printer_discovery.isRunning():
+            return
+
+        self.printer_discovery = PrinterDiscoveryThread(self)
+        self.printer_discovery.printers_found.connect(self.on_printers_found)
+        self.printer_discovery.discovery_failed.connect(self.on_printers_discovery_failed)
+        self.printer_discovery.finished.connect(self.printer_discovery.deleteLater)
+        self.printer_discovery.start()
+
+    def on_printers_found(self, printers, default_name):
+        """Обработка результата фонового поиска принтеров"""
+        self.printer_discovery = None
+        self.printer_cache.invalidate()
+        self.print_sessions.invalidate()
+        self.printer_cache.save_last_known(printers, default_name)
+        self.update_printers_list(printers, default_name)
+
+        if not printers and not self.raw_printers and not self.printer_pools:
+            QMessageBox.warning(self, "Ошибка", "Не найдено ни одного принтера!")
+
+    def on_printers_discovery_failed(self, error):
+        self.printer_discovery = None
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить список принтеров: {error}")
+
+    def update_printers_list(self, printers, default_name=""):
         """Обновление списка доступных принтеров"""
+        current_name = self.printer_combo.currentText()
+        self.printer_combo.blockSignals(True)
         try:
             self.printer_combo.clear()
 
-            # Получаем список принтеров
-            printers = QPrinterInfo.availablePrinters()
-            logger.debug(f"Найдено принтеров: {len(printers)}")
-
+            direct_printers = list(self.printer_pools) + list(self.raw_printers)
+            printers = list(printers) + [name for name in direct_printers if name not in printers]
             if not printers:
-                QMessageBox.warning(self, "Ошибка", "Не найдено ни одного принтера!")
                 # Добавляем заглушку
                 self.printer_combo.addItem("Принтеры не найдены", "")
                 return
 
             # Добавляем принтеры в комбобокс
-            for printer in printers:
-                printer_name = printer.printerName()
+            for printer_name in printers:
                 logger.debug(f"Добавляем принтер: {printer_name}")
 
                 # Просто добавляем имя принтера, без userData
                 self.printer_combo.addItem(printer_name)
 
-            # Устанавливаем принтер по умолчанию
-            default_printer = QPrinterInfo.defaultPrinter()
-            if default_printer and not default_printer.isNull():
-                default_name = default_printer.printerName()
+            # Сохраняем выбор пользователя, иначе ставим принтер по умолчанию
+            index = self.printer_combo.findText(current_name)
+            if index < 0 and default_name:
                 index = self.printer_combo.findText(default_name)
                 if index >= 0:
-                    self.printer_combo.setCurrentIndex(index)
                     logger.debug(f"Установлен принтер по умолчанию: {default_name}")
+            if index >= 0:
+                self.printer_combo.setCurrentIndex(index)
 
+        finally:
+            self.printer_combo.blockSignals(False)
             self.update_zebra_settings_visibility()
+            self.load_printer_presets()
 
-        except Exception as e:
-            logger.error(f"Ошибка при обновлении списка принтеров: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить список принтеров: {str(e)}")
+    def load_printer_presets(self, force=False):
+        """Заполняет список пресетов выбранного принтера и применяет активный"""
+        printer_name = self.printer_combo.currentText()
+        if printer_name == self.presets_printer and not force:
+            return
+        self.presets_printer = printer_name
+
+        active_name = self.presets.active_name(printer_name)
+        self.preset_combo.blockSignals(True)
+        self.preset_combo.clear()
+        self.preset_combo.addItems(self.presets.names(printer_name))
+        self.preset_combo.setCurrentIndex(self.preset_combo.findText(active_name) if active_name else -1)
+        self.preset_combo.blockSignals(False)
+        self.delete_preset_btn.setEnabled(self.preset_combo.count() > 0)
+
+        preset = self.presets.active(printer_name)
+        if preset is not None and not force:
+            self.apply_preset(preset)
+
+    def current_preset(self):
+        """Настройки носителя из левой панели"""
+        params = self.current_label_params()
+        orientation = self.current_orientation()
+        return MediaPreset(params.width_mm, params.height_mm, params.margin_left_mm, params.margin_top_mm,
+                           params.dpi, params.keep_aspect_ratio, self.darkness_spin.value(),
+                           orientation.rotation, orientation.mirror, orientation.invert)
+
+    def apply_preset(self, preset):
+        self.width_spin.setValue(preset.width_mm)
+        self.height_spin.setValue(preset.height_mm)
+        self.margin_left_spin.setValue(preset.margin_left_mm)
+        self.margin_top_spin.setValue(preset.margin_top_mm)
+        self.dpi_spin.setValue(preset.dpi)
+        self.aspect_ratio_checkbox.setChecked(preset.keep_aspect_ratio)
+        self.darkness_spin.setValue(preset.darkness)
+        self.rotation_combo.setCurrentIndex(max(0, self.rotation_combo.findData(preset.rotation)))
+        self.mirror_checkbox.setChecked(preset.mirror)
+        self.invert_checkbox.setChecked(preset.invert)
+
+    def on_preset_selected(self, index):
+        printer_name = self.printer_combo.currentText()
+        preset_name = self.preset_combo.itemText(index)
+        preset = self.presets.get(printer_name, preset_name)
+        if preset is not None:
+            self.presets.select(printer_name, preset_name)
+            self.apply_preset(preset)
+
+    def save_preset(self):
+        """Сохраняет текущие настройки как пресет выбранного принтера"""
+        printer_name = self.printer_combo.currentText()
+        if not printer_name or self.printer_combo.currentData() == "":
+            QMessageBox.warning(self, "Ошибка", "Не выбран принтер!")
+            return
+        preset = self.current_preset()
+        default_name = self.preset_combo.currentText() or f"{preset.width_mm:g}x{preset.height_mm:g} мм, {preset.dpi} DPI"
+        preset_name, ok = QInputDialog.getText(self, "Пресет", f"Название пресета для '{printer_name}':",
+                                               text=default_name)
+        preset_name = preset_name.strip()
+        if not ok or not preset_name:
+            return
+        self.presets.save(printer_name, preset_name, preset)
+        self.load_printer_presets(force=True)
+        logger.info(f"Сохранён пресет '{preset_name}' для {printer_name}: {preset}")
+
+    def delete_preset(self):
+        printer_name = self.printer_combo.currentText()
+        preset_name = self.preset_combo.currentText()
+        if not preset_name:
+            return
+        self.presets.delete(printer_name, preset_name)
+        self.load_printer_presets(force=True)
+
+    def warm_render_cache(self):
+        """Фоновая отрисовка самых частых шаблонов каждого принтера под его активный пресет"""
+        printers = {self.printer_combo.itemText(i) for i in range(self.printer_combo.count())}
+        since = time.time() - self.WARM_HISTORY_DAYS * 24 * 3600
+        for printer_name, preset in self.presets.active_presets().items():
+            if printer_name not in printers:
+                continue
+            paths = [path for path, _ in self.journal.top_templates(printer_name, since, self.WARM_TEMPLATES)
+                     if path and os.path.exists(path)]
+            if not paths:
+                continue
+            logger.debug(f"Прогрев кэша для {printer_name}: {len(paths)} шаблонов")
+            self.prerenderer.warm(paths, preset.label_params, self.is_direct_printer(printer_name))
 
     def add_images(self):
         file_dialog = QFileDialog()
-        file_dialog.setNameFilter("Images (*.png *.jpg *.jpeg *.bmp *.gif)")
+        file_dialog.setNameFilter(f"Images ({' '.join('*' + ext for ext in IMAGE_EXTENSIONS)})")
         file_dialog.setFileMode(QFileDialog.ExistingFiles)
 
         if file_dialog.exec_():
-            file_names = file_dialog.selectedFiles()
-            for file_name in file_names:
-                self.images_list.addItem(file_name)
+            self.import_images(file_dialog.selectedFiles())
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку с изображениями")
+        if folder:
+            self.import_images([folder])
+
+    def import_images(self, paths):
+        """Фоновая проверка и добавление файлов (папки раскрываются), без повторов по содержимому"""
+        known_hashes = {self.images_list.item(i).data(Qt.UserRole) for i in range(self.images_list.count())}
+        known_hashes.discard(None)
+        self.image_importer.start(paths, known_hashes)
+        self.statusBar().showMessage("Импорт изображений: поиск файлов (Esc - отменить)")
+
+    def on_image_imported(self, image):
+        item = QListWidgetItem(image.path)
+        item.setData(Qt.UserRole, image.content_hash)
+        item.setToolTip(f"{image.width}x{image.height}")
+        self.images_list.addItem(item)
+        self.thumbnails_timer.start()
+
+    def on_import_progress(self, done, total):
+        self.statusBar().showMessage(f"Импорт изображений: {done} из {total} (Esc - отменить)")
+
+    def cancel_import(self):
+        """Останавливает импорт; уже добавленные изображения остаются в списке"""
+        if not self.image_importer.is_running:
+            return
+        self.image_importer.cancel()
+        self.statusBar().showMessage(f"Импорт отменён, изображений в списке: {self.images_list.count()}", 10000)
+        self.prerender_images()
+
+    def on_import_finished(self, duplicates, errors):
+        message = f"Импорт завершён, изображений в списке: {self.images_list.count()}"
+        if duplicates:
+            message += f", пропущено повторов: {duplicates}"
+        self.statusBar().showMessage(message, 10000)
+        self.show_error_report("Ошибки импорта", "Не удалось добавить файлов", errors)
+        self.prerender_images()
+
+    def show_error_report(self, title, text, errors):
+        """Одно окно со списком ошибок (путь, текст) вместо окна на каждый файл"""
+        if not errors:
+            return
+        for path, error in errors:
+            logger.warning(f"{path}: {error}")
+        box = QMessageBox(QMessageBox.Warning, title, f"{text}: {len(errors)}", QMessageBox.Ok, self)
+        box.setDetailedText("\n".join(error for _, error in errors))
+        box.exec_()
+
+    def request_visible_thumbnails(self):
+        """Ставит в загрузку миниатюры строк, видимых в списке"""
+        count = self.images_list.count()
+        if not count:
+            return
+        viewport = self.images_list.viewport()
+        first = self.images_list.indexAt(QPoint(0, 0)).row()
+        last = self.images_list.indexAt(QPoint(0, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else last
+        paths = [self.images_list.item(row).text() for row in range(first, last + 1)
+                 if self.images_list.item(row).icon().isNull()]
+        self.thumbnail_loader.request(paths)
+
+    def on_thumbnail_loaded(self, image_path, thumbnail):
+        icon = QIcon(QPixmap.fromImage(thumbnail))
+        for item in self.images_list.findItems(image_path, Qt.MatchExactly):
+            item.setIcon(icon)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if paths:
+            event.acceptProposedAction()
+            self.import_images(paths)
+
+    def current_label_params(self):
+        """Параметры этикетки из левой панели"""
+        return LabelParams(
+            width_mm=self.width_spin.value(),
+            height_mm=self.height_spin.value(),
+            margin_left_mm=self.margin_left_spin.value(),
+            margin_top_mm=self.margin_top_spin.value(),
+            dpi=int(self.dpi_spin.value()),
+            keep_aspect_ratio=self.aspect_ratio_checkbox.isChecked(),
+        )
+
+    def current_orientation(self):
+        """Ориентация печати из левой панели"""
+        return Orientation(
+            rotation=self.rotation_combo.currentData(),
+            mirror=self.mirror_checkbox.isChecked(),
+            invert=self.invert_checkbox.isChecked(),
+        )
+
+    def is_direct_printer(self, printer_name):
+        """Печать идёт командами принтера без драйвера (сетевой принтер или пул)"""
+        return printer_name in self.raw_printers or printer_name in self.printer_pools
+
+    def prerender_images(self):
+        """Фоновый рендеринг изображений из списка под текущие настройки"""
+        self.prerender_timer.stop()
+        image_paths = [self.images_list.item(i).text() for i in range(min(self.images_list.count(), 20))]
+        with_bitmap = self.is_direct_printer(self.printer_combo.currentText())
+        self.prerenderer.request(image_paths, self.current_label_params(), with_bitmap)
 
     def remove_selected_image(self):
         for item in self.images_list.selectedItems():
             self.images_list.takeItem(self.images_list.row(item))
 
+    @profiled
     def print_images(self):
+        self.open_storage()
         if self.images_list.count() == 0:
             QMessageBox.warning(self, "Ошибка", "Нет изображений для печати!")
             return
@@ -609,155 +1233,244 @@ class PrintApp(QMainWindow):
             printer_name = self.printer_combo.currentText()
             logger.debug(f"Выбран принтер: {printer_name}")
 
-            # Создаем QPrinterInfo по имени
-            printer_info = QPrinterInfo.printerInfo(printer_name)
-            if printer_info.isNull():
+            is_raw_printer = self.is_direct_printer(printer_name)
+            if not is_raw_printer and self.printer_cache.printer_info(printer_name).isNull():
                 QMessageBox.warning(self, "Ошибка", f"Принтер '{printer_name}' не найден!")
                 return
 
-            printer = QPrinter(printer_info)
-            printer.setFullPage(True)
-
-            width_mm = self.width_spin.value()
-            height_mm = self.height_spin.value()
-            margin_left_mm = self.margin_left_spin.value()
-            margin_top_mm = self.margin_top_spin.value()
-            dpi = int(self.dpi_spin.value())
+            params = self.current_label_params()
             copies = self.copies_spin.value()
-            keep_aspect_ratio = self.aspect_ratio_checkbox.isChecked()
+            job = PrintJob(printer_name, params, copies)
 
-            printer_name_lower = printer_name.lower()
-            if "zebra" in printer_name_lower:
+            darkness = None
+            if self.printer_supports_darkness(printer_name):
                 darkness = self.darkness_spin.value()
-                # Здесь можно добавить настройки для Zebra
 
-            printer.setPaperSize(QSizeF(width_mm, height_mm), QPrinter.Millimeter)
-            printer.setResolution(dpi)
-            printer.setCopyCount(copies)
+            items_to_print = self.images_list.selectedItems()
+            if not items_to_print:
+                items_to_print = [self.images_list.item(i) for i in range(self.images_list.count())]
+
+            # Документы (текст из "Печать текста") уходят на Zebra командами ZPL, если принтер сам
+            # выполнит выбранную ориентацию; иначе печатается их растр. Инверсия (^LRY) у Zebra
+            # действует только в пределах полей, а не на всю этикетку, поэтому с ней - тоже растр
+            orientation = self.current_orientation()
+            print_vector = (is_raw_printer and self.printer_backend(printer_name) == "zpl" and not orientation.invert
+                            and split_orientation(orientation, **ZPL_ORIENTATION)[0].is_identity)
+
+            labels = []
+            errors = []
+            cache_hits = 0
+            for item in items_to_print:
+                image_path = item.text()
+                document = item.data(LABEL_DOCUMENT_ROLE)
+                # Документ, размеченный под другой размер этикетки, печатается растром (масштабируется под носитель)
+                if print_vector and document is not None and document.fits(params):
+                    labels.append(RenderedLabel(None, document=document))
+                    job.set_template(image_path)
+                    continue
+
+                # Этикетка могла быть уже отрисована в фоне при выборе шаблона
+                rendered = self.prerenderer.get(image_path, params)
+                if rendered is None and is_raw_printer and self.template_pack is not None:
+                    # Растр из пакета шаблонов уходит в кодировщик без копирования
+                    bitmap = self.template_pack.bitmap(image_path, params)
+                    rendered = RenderedLabel(None, bitmap) if bitmap is not None else None
+                if rendered is None:
+                    # Локальный дисковый кэш; общий уровень (другие станции) читает только предрендер в фоне
+                    with job.stage("cache"):
+                        rendered = self.render_cache.get_label(image_path, params, shared=False)
+                    if rendered is not None and rendered.page is None and not is_raw_printer:
+                        rendered = None
+                    if rendered is not None:
+                        self.prerenderer.put(image_path, params, rendered)
+                if rendered is not None:
+                    cache_hits += 1
+                else:
+                    try:
+                        rendered = render_page(image_path, params, job)
+                    except ImageLoadError as e:
+                        errors.append((image_path, str(e)))
+                        continue
+                    self.prerenderer.put(image_path, params, rendered)
+                    if not is_raw_printer:
+                        self.render_cache.put_label(image_path, params, rendered)
+
+                if is_raw_printer:
+                    # Для прямой печати держим только упакованный растр (1 бит на точку), страницу отпускаем
+                    if rendered.bitmap is None:
+                        attach_bitmap(rendered, params, job)
+                        # Повторное добавление учитывает растр в объёме кэша предрендера
+                        self.prerenderer.put(image_path, params, rendered)
+                        self.render_cache.put_label(image_path, params, rendered)
+                    rendered = RenderedLabel(None, rendered.bitmap)
+
+                labels.append(rendered)
+                job.set_template(image_path)
+
+            self.show_error_report("Ошибка", "Не удалось загрузить изображений", errors)
+            job.record["labels"] = len(labels)
+            job.record["cache"] = "hit" if labels and cache_hits == len(labels) else "partial" if cache_hits else "miss"
+            if labels and is_raw_printer:
+                self.print_raw(printer_name, params, copies, darkness, labels, job)
+            elif labels:
+                orientation = self.current_orientation()
+                pages = []
+                for label in labels:
+                    with job.stage("convert"):
+                        page, page_params = orient_page(label.page, params, orientation)
+                    pages.append(page)
+                # Последовательные задания с теми же настройками уйдут одним документом
+                self.print_sessions.submit(printer_name, page_params, copies, pages, job)
+
+        except Exception as e:
+            logger.error(f"Ошибка при подготовке к печати: {e}")
+            QMessageBox.critical(self, "Ошибка", f"Ошибка при подготовке к печати: {str(e)}")
 
-            painter = None
+    def print_raw(self, printer_name, params, copies, darkness, labels, job):
+        """Печать на сетевой принтер командами ZPL/EPL/TSPL/ESC-POS без драйвера"""
+        language = self.printer_backend(printer_name)
+        job.record["language"] = language
+        payloads = encode_labels(labels, language, params, copies, darkness, self.current_orientation(), job)
+        # Этикетки уходят из потока принтера (пул - между его принтерами), задание завершится по сигналу
+        submit_job(self.spool, self.direct_sender(printer_name), printer_name, payloads, job)
+
+    def on_pool_job_finished(self, job, send_ms):
+        """Все этикетки задания отправлены принтерами пула"""
+        if job is None:
+            # Повторная печать из истории
+            QMessageBox.information(self, "Успех", "Печать завершена!")
+            return
+        if isinstance(job, SpoolEntry):
+            # Допечатка задания из спула
+            self.spool.complete(job)
+            QMessageBox.information(self, "Успех", "Допечатка завершена!")
+            return
+        self.spool.complete(job.spool_entry)
+        job.add_stage("send", send_ms)
+        job.finish()
+        self.on_jobs_spooled([job])
+        self.on_print_job_finished(job.record["printer"], job.record["labels"])
+
+    def on_pool_job_failed(self, job, error):
+        logger.error(f"Ошибка прямой печати: {error}")
+        entry = job if isinstance(job, SpoolEntry) else getattr(job, "spool_entry", None)
+        if entry is not None:
+            # Задание остаётся в спуле: неотправленные этикетки будут предложены к допечатке
+            entry.close()
+            error += "\nНеотправленные этикетки будут предложены к допечатке при следующем запуске."
+        QMessageBox.critical(self, "Ошибка", error)
+
+    def direct_sender(self, printer_name):
+        """Пул, через который идёт прямая печать на принтер (для одиночного принтера - пул из него одного)"""
+        return self.printer_pools.get(printer_name) or self.direct_senders.get(printer_name)
+
+    def on_jobs_spooled(self, jobs):
+        """Запись завершённых заданий в журнал и историю"""
+        for job in jobs:
+            self.job_log.write(job)
             try:
-                items_to_print = self.images_list.selectedItems()
-                if not items_to_print:
-                    items_to_print = [self.images_list.item(i) for i in range(self.images_list.count())]
+                self.journal.record(job)
+            except Exception as e:
+                logger.error(f"Не удалось записать задание в историю: {e}")
 
-                for item in items_to_print:
-                    image_path = item.text()
-                    image = QImage(image_path)
+    def reprint_job(self, job):
+        """Повторная печать задания из истории: сохранённые команды уходят на принтер без рендеринга"""
+        printer_name = job["printer"]
+        if printer_name not in self.raw_printers and printer_name not in self.printer_pools:
+            QMessageBox.warning(self, "Ошибка", f"Принтер '{printer_name}' больше не настроен для прямой печати!")
+            return
 
-                    if image.isNull():
-                        QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить изображение: {image_path}")
-                        continue
+        payloads = self.journal.payloads(job["id"])
+        if payloads is None:
+            QMessageBox.warning(self, "Ошибка", "Команды этого задания удалены из истории!")
+            return
 
-                    # РАСЧЕТ РАЗМЕРОВ В ПИКСЕЛЯХ
-                    target_width_px = int(width_mm * dpi / 25.4)
-                    target_height_px = int(height_mm * dpi / 25.4)
-                    margin_left_px = int(margin_left_mm * dpi / 25.4)
-                    margin_top_px = int(margin_top_mm * dpi / 25.4)
-
-                    if keep_aspect_ratio:
-                        # СОХРАНЕНИЕ ПРОПОРЦИЙ С ЦЕНТРИРОВАНИЕМ
-                        # Вычисляем соотношение сторон исходного изображения
-                        source_aspect = image.width() / image.height()
-                        target_aspect = target_width_px / target_height_px
-
-                        if source_aspect > target_aspect:
-                            # Изображение шире, чем целевая область - ограничиваем по ширине
-                            scaled_width = target_width_px
-                            scaled_height = int(target_width_px / source_aspect)
-                        else:
-                            # Изображение выше, чем целевая область - ограничиваем по высоте
-                            scaled_height = target_height_px
-                            scaled_width = int(target_height_px * source_aspect)
-
-                        # Масштабируем изображение с сохранением пропорций
-                        scaled_image = image.scaled(
-                            scaled_width,
-                            scaled_height,
-                            Qt.KeepAspectRatio,
-                            Qt.SmoothTransformation
-                        )
-
-                        # Вычисляем координаты для центрирования
-                        x_offset = margin_left_px + (target_width_px - scaled_width) // 2
-                        y_offset = margin_top_px + (target_height_px - scaled_height) // 2
-
-                        if not painter:
-                            painter = QPainter()
-                            if not painter.begin(printer):
-                                QMessageBox.warning(self, "Ошибка", "Не удалось начать печать!")
-                                return
-
-                        # Рисуем белый фон
-                        painter.fillRect(
-                            margin_left_px,
-                            margin_top_px,
-                            target_width_px,
-                            target_height_px,
-                            Qt.white
-                        )
-
-                        # Рисуем изображение по центру
-                        painter.drawImage(x_offset, y_offset, scaled_image)
-
-                    else:
-                        # РАСТЯГИВАЕМ ИЗОБРАЖЕНИЕ БЕЗ СОХРАНЕНИЯ ПРОПОРЦИЙ
-                        scaled_image = image.scaled(
-                            target_width_px,
-                            target_height_px,
-                            Qt.IgnoreAspectRatio,  # Игнорируем пропорции
-                            Qt.SmoothTransformation
-                        )
-
-                        if not painter:
-                            painter = QPainter()
-                            if not painter.begin(printer):
-                                QMessageBox.warning(self, "Ошибка", "Не удалось начать печать!")
-                                return
-
-                        x_offset = margin_left_px
-                        y_offset = margin_top_px
-                        painter.drawImage(x_offset, y_offset, scaled_image)
-
-                    if item != items_to_print[-1]:
-                        printer.newPage()
-
-                if painter:
-                    painter.end()
-
-                QMessageBox.information(self, "Успех", "Печать завершена!")
+        logger.info(f"Повторная печать задания {job['id']} на {printer_name}")
+        self.direct_sender(printer_name).submit(payloads)
 
-            except Exception as e:
-                if painter:
-                    painter.end()
-                logger.error(f"Ошибка при печати: {e}")
-                QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при печати: {str(e)}")
+    def resume_spool(self):
+        """Предлагает допечатать задания, прерванные падением программы или перезагрузкой"""
+        entries = self.spool.pending()
+        if not entries:
+            return
 
-        except Exception as e:
-            logger.error(f"Ошибка при подготовке к печати: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при подготовке к печати: {str(e)}")
+        labels_count = sum(entry.labels_count - len(entry.acked) for entry in entries)
+        answer = QMessageBox.question(
+            self, "Незавершённая печать",
+            f"Найдено незавершённых заданий: {len(entries)} (неотправленных этикеток: {labels_count}).\n"
+            f"Допечатать их с места остановки?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if answer != QMessageBox.Yes:
+            for entry in entries:
+                self.spool.complete(entry)
+            logger.info(f"Спул: отменена допечатка {len(entries)} заданий")
+            return
+
+        for entry in entries:
+            printer_name = entry.printer
+            indices, payloads = zip(*entry.remaining())
+            sender = self.direct_sender(printer_name)
+            if sender is None:
+                logger.warning(f"Спул: принтер '{printer_name}' больше не настроен, задание оставлено")
+                entry.close()
+                continue
+            logger.info(f"Спул: допечатка {len(payloads)} эт. на {printer_name}")
+            sender.submit(list(payloads), entry, on_sent=entry.ack, indices=indices)
+
+    def on_print_job_finished(self, printer_name, pages_count):
+        QMessageBox.information(self, "Успех", "Печать завершена!")
+
+    def on_print_job_failed(self, printer_name, error):
+        QMessageBox.critical(self, "Ошибка", error)
+
+    def closeEvent(self, event):
+        # Допечатываем задания, ожидающие окна объединения
+        self.print_sessions.flush()
+        if self.journal is not None:
+            self.journal.close()
+        self.stall_watchdog.stop()
+        super().closeEvent(event)
 
     def open_text_print_dialog(self):
         """Открытие диалога печати текста"""
         dialog = TextPrintDialog(self)
         dialog.exec_()
 
+    def open_history_dialog(self):
+        """Открытие истории печати"""
+        self.open_storage()
+        dialog = HistoryDialog(self.journal, self)
+        dialog.exec_()
+
+    def open_job_stats_dialog(self):
+        """Открытие окна статистики печати"""
+        dialog = JobStatsDialog(self.job_log, self)
+        dialog.exec_()
+
 
 if __name__ == "__main__":
     if sys.platform == "win32":
         myappid = "ZebraLemana 2.0.0"
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
 
-    app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon(get_resource_path("1.ico")))
+    startup_profiler = StartupProfiler(IMPORT_STARTED)
+    startup_profiler.add_phase("импорт", IMPORT_STARTED)
+
+    with startup_profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
+        app.setWindowIcon(QIcon(get_resource_path("1.ico")))
 
     # Применяем стили
 
-    window = PrintApp()
-    window.show()
+    window = PrintApp(startup_profiler)
+
+    with startup_profiler.phase("стили"):
+        # Настраиваем стили кнопок до показа окна, чтобы не перерисовывать его
+        setup_button_styles(window)
+        apply_styles(app)
 
-    # Настраиваем стили кнопок после создания окна
-    setup_button_styles(window)
-    apply_styles(app)
+    with startup_profiler.phase("показ окна"):
+        window.show()
 
     sys.exit(app.exec_())
\ No newline at end of file
@@ -191,7 +191,7 @@ def setup_button_styles(window):
     #     btn.setMinimumWidth(100)
 
     # Настраиваем стиль для кнопок добавления/удаления изображений
-    for btn in [window.add_images_btn, window.remove_image_btn]:
+    for btn in [window.add_images_btn, window.add_folder_btn, window.remove_image_btn]:
         btn.setStyleSheet("""
             QPushButton {
                 background-color: rgba(52, 152, 219, 0.8);
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from utils import bitops
+from utils.bitops import Orientation, invert_bitmap, mirror_bitmap, orient_bitmap, rotate_bitmap
+from utils.render import Bitmap
+
+# 10x2 точек: строка 0 - точки 0, 1, 2 и 9; строка 1 - точка 8
+BITMAP = Bitmap(b"\xe0\x40\x00\x80", 10, 2, 2)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Каждый тест проходит и с numpy, и построчной реализацией на Python"""
+    if request.param == "python":
+        monkeypatch.setattr(bitops, "optional_numpy", lambda: None)
+    elif bitops.optional_numpy() is None:
+        pytest.skip("numpy не установлен")
+    return request.param
+
+
+def test_rotate_90(backend):
+    assert rotate_bitmap(BITMAP, 90) == Bitmap(b"\x40\x40\x40\x00\x00\x00\x00\x00\x80\x40", 2, 10, 1)
+
+
+def test_rotate_270(backend):
+    assert rotate_bitmap(BITMAP, 270) == Bitmap(b"\x80\x40\x00\x00\x00\x00\x00\x80\x80\x80", 2, 10, 1)
+
+
+def test_rotate_180(backend):
+    assert rotate_bitmap(BITMAP, 180) == Bitmap(b"\x40\x00\x81\xc0", 10, 2, 2)
+
+
+def test_mirror(backend):
+    assert mirror_bitmap(BITMAP) == Bitmap(b"\x81\xc0\x40\x00", 10, 2, 2)
+
+
+def test_invert_keeps_padding_white(backend):
+    # Последние 6 бит каждой строки - выравнивание, они остаются нулевыми
+    assert invert_bitmap(BITMAP) == Bitmap(b"\x1f\x80\xff\x40", 10, 2, 2)
+
+
+def test_full_turn_is_identity(backend):
+    bitmap = BITMAP
+    for _ in range(4):
+        bitmap = rotate_bitmap(bitmap, 90)
+    assert bitmap == BITMAP
+
+
+def test_numpy_matches_python(monkeypatch):
+    if bitops.optional_numpy() is None:
+        pytest.skip("numpy не установлен")
+    generator = random.Random(1)
+    width, height = 13, 7
+    bytes_per_row = (width + 7) // 8
+    tail_mask = (0xFF << (bytes_per_row * 8 - width)) & 0xFF
+    data = bytearray(generator.randrange(256) for _ in range(bytes_per_row * height))
+    for row in range(height):
+        data[(row + 1) * bytes_per_row - 1] &= tail_mask
+    bitmap = Bitmap(bytes(data), width, height, bytes_per_row)
+
+    orientations = [Orientation(rotation, mirror, invert)
+                    for rotation in bitops.ROTATIONS for mirror in (False, True) for invert in (False, True)]
+    with_numpy = [orient_bitmap(bitmap, orientation) for orientation in orientations]
+    monkeypatch.setattr(bitops, "optional_numpy", lambda: None)
+    assert [orient_bitmap(bitmap, orientation) for orientation in orientations] == with_numpy
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from PyQt5.QtGui import QImage
+
+from utils.content_cache import ContentCache, ContentStore
+from utils.prerender import RenderedLabel
+from utils.render import Bitmap, LabelPage, LabelParams
+
+KEY = "ab" + "0" * 38
+PARAMS = LabelParams(10, 5, 0, 0, 203, False)
+
+
+def files_in(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "шаблон.png"
+    path.write_bytes(b"png")
+    return str(path)
+
+
+def test_read_through_copies_to_local(tmp_path):
+    ContentStore(str(tmp_path / "shared")).put(KEY, b"data")
+    cache = ContentCache(str(tmp_path / "local"), str(tmp_path / "shared"))
+
+    # Без общего уровня (как в GUI-потоке) запись не находится
+    assert cache.get(KEY, shared=False) is None
+    assert cache.get(KEY) == b"data"
+    assert cache.local.get(KEY) == b"data"
+    assert cache.get(KEY, shared=False) == b"data"
+
+
+def test_put_writes_shared_in_background(tmp_path):
+    cache = ContentCache(str(tmp_path / "local"), str(tmp_path / "shared"))
+    cache.put(KEY, b"data")
+    assert cache.local.get(KEY) == b"data"
+
+    cache.flush()
+    assert ContentStore(str(tmp_path / "shared")).get(KEY) == b"data"
+
+
+def test_atomic_put_leaves_no_temp_files(tmp_path):
+    store = ContentStore(str(tmp_path))
+    store.put(KEY, b"first")
+    store.put(KEY, b"second")
+    assert store.get(KEY) == b"second"
+    assert files_in(tmp_path) == [KEY]
+
+
+def test_failed_put_leaves_no_partial_file(tmp_path, monkeypatch):
+    store = ContentStore(str(tmp_path))
+
+    def failing_replace(src, dst):
+        raise OSError("нет места на диске")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        store.put(KEY, b"data")
+    assert store.get(KEY) is None
+    assert files_in(tmp_path) == []
+
+
+def test_unavailable_share_falls_back_to_local(tmp_path):
+    # Вместо папки - обычный файл: ни чтение, ни запись в общий уровень невозможны
+    shared = tmp_path / "shared"
+    shared.write_bytes(b"")
+    cache = ContentCache(str(tmp_path / "local"), str(shared))
+
+    assert cache.get(KEY) is None
+    cache.put(KEY, b"data")
+    cache.flush()
+    assert cache.get(KEY) == b"data"
+
+
+def test_bitmap_added_to_cached_page(qt_app, tmp_path, template):
+    image = QImage(4, 2, QImage.Format_Grayscale8)
+    image.fill(255)
+    bitmap = Bitmap(b"\x80\x40", 4, 2, 1)
+    cache = ContentCache(str(tmp_path / "local"), str(tmp_path / "shared"))
+    cache.put_label(template, PARAMS, RenderedLabel(LabelPage(image, 0, 0, None)))
+    cache.put_label(template, PARAMS, RenderedLabel(LabelPage(image, 0, 0, None), bitmap))
+    cache.flush()
+
+    # Другая станция: пустой локальный кэш, общая папка та же
+    other = ContentCache(str(tmp_path / "other"), str(tmp_path / "shared"))
+    rendered = other.get_label(template, PARAMS)
+    assert rendered.page.image.size() == image.size()
+    assert rendered.bitmap == bitmap
@@ -0,0 +1,105 @@
+import pytest
+
+from utils.bitops import NO_ORIENTATION, Orientation
+from utils.direct_print import encode_labels
+from utils.encoders import encode_epl, encode_escpos, encode_tspl, encode_zpl
+from utils.job_log import PrintJob
+from utils.prerender import RenderedLabel
+from utils.render import Bitmap, LabelParams
+
+# 10x2 точек, 2 байта на строку (6 бит выравнивания в конце строки)
+# строка 0: точки 0, 1, 2 и 9; строка 1: точка 8
+BITMAP = Bitmap(b"\xe0\x40\x00\x80", 10, 2, 2)
+# При 254 dpi точка - ровно 0,1 мм
+PARAMS = LabelParams(1, 0.2, 0, 0, 254, False)
+
+ROTATED_180 = b"\x40\x00\x81\xc0"
+MIRRORED = b"\x81\xc0\x40\x00"
+
+
+def encode(language, copies=1, darkness=None, orientation=NO_ORIENTATION):
+    """Этикетка через путь прямой печати: ориентация делится между принтером и растром"""
+    job = PrintJob("тест", PARAMS, copies)
+    return encode_labels([RenderedLabel(None, BITMAP)], language, PARAMS, copies, darkness, orientation, job)[0]
+
+
+def test_zpl():
+    assert encode_zpl(BITMAP) == b"^XA^PON^PMN^LRN^PW10^LL2^FO0,0^GFA,4,4,2,E0400080^FS^XZ"
+
+
+def test_zpl_darkness_copies():
+    assert encode_zpl(BITMAP, copies=3, darkness=7) == b"^XA~SD07^PON^PMN^LRN^PW10^LL2^FO0,0^GFA,4,4,2,E0400080^FS^PQ3^XZ"
+
+
+@pytest.mark.parametrize("orientation, expected", [
+    (Orientation(180, False, False), b"^XA^POI^PMN^LRN^PW10^LL2^FO0,0^GFA,4,4,2,E0400080^FS^XZ"),
+    (Orientation(0, True, False), b"^XA^PON^PMY^LRN^PW10^LL2^FO0,0^GFA,4,4,2,E0400080^FS^XZ"),
+    (Orientation(0, False, True), b"^XA^PON^PMN^LRY^PW10^LL2^FO0,0^GFA,4,4,2,E0400080^FS^XZ"),
+])
+def test_zpl_orientation(orientation, expected):
+    assert encode("zpl", orientation=orientation) == expected
+
+
+def test_zpl_resets_orientation_after_oriented_job():
+    # Настройки ориентации остаются на принтере: обычное задание после перевёрнутого их сбрасывает
+    encode("zpl", orientation=Orientation(180, True, True))
+    assert encode("zpl").startswith(b"^XA^PON^PMN^LRN^")
+
+
+def test_epl():
+    # В EPL бит 0 - черная точка, биты выравнивания - белые (1)
+    assert encode_epl(BITMAP) == b"\nN\nZT\nq10\nQ2,16\nGW0,0,2,2,\x1f\xbf\xff\x7f\nP1\n"
+
+
+def test_epl_darkness_copies():
+    assert encode_epl(BITMAP, copies=2, darkness=20) == (b"\nN\nD10\nZT\nq10\nQ2,16\n"
+                                                         b"GW0,0,2,2,\x1f\xbf\xff\x7f\nP2\n")
+
+
+@pytest.mark.parametrize("orientation, expected", [
+    # Поворот на 180 делает принтер, зеркало - растр
+    (Orientation(180, False, False), b"\nN\nZB\nq10\nQ2,20\nGW0,0,2,2,\x1f\xbf\xff\x7f\nP1\n"),
+    (Orientation(0, True, False), b"\nN\nZT\nq10\nQ2,20\nGW0,0,2,2,\x7e\x3f\xbf\xff\nP1\n"),
+])
+def test_epl_orientation(orientation, expected):
+    assert encode("epl", orientation=orientation) == expected
+
+
+def test_tspl():
+    assert encode_tspl(BITMAP, dpi=254) == (b"SIZE 1 mm,0.2 mm\r\nGAP 2 mm,0 mm\r\nDIRECTION 0,0\r\nCLS\r\n"
+                                            b"BITMAP 0,0,2,2,0,\x1f\xbf\xff\x7f\r\nPRINT 1,1\r\n")
+
+
+def test_tspl_darkness_copies():
+    assert encode_tspl(BITMAP, copies=4, darkness=30, dpi=254) == (
+        b"SIZE 1 mm,0.2 mm\r\nGAP 2 mm,0 mm\r\nDENSITY 15\r\nDIRECTION 0,0\r\nCLS\r\n"
+        b"BITMAP 0,0,2,2,0,\x1f\xbf\xff\x7f\r\nPRINT 1,4\r\n")
+
+
+@pytest.mark.parametrize("orientation, direction", [
+    (Orientation(180, False, False), b"DIRECTION 1,0"),
+    (Orientation(0, True, False), b"DIRECTION 0,1"),
+])
+def test_tspl_orientation(orientation, direction):
+    assert encode("tspl", orientation=orientation) == (
+        b"SIZE 1 mm,0.2 mm\r\nGAP 2 mm,0 mm\r\n" + direction + b"\r\nCLS\r\n"
+        b"BITMAP 0,0,2,2,0,\x1f\xbf\xff\x7f\r\nPRINT 1,1\r\n")
+
+
+def test_escpos():
+    assert encode_escpos(BITMAP) == b"\x1b@\x1dv0\x00\x02\x00\x02\x00\xe0\x40\x00\x80\x1dVB\x00"
+
+
+def test_escpos_copies_cut_separately():
+    # Плотность ESC/POS не поддерживает, каждая копия отрезается
+    raster = b"\x1dv0\x00\x02\x00\x02\x00\xe0\x40\x00\x80\x1dVB\x00"
+    assert encode_escpos(BITMAP, copies=2, darkness=20) == b"\x1b@" + raster * 2
+
+
+@pytest.mark.parametrize("orientation, data", [
+    (Orientation(180, False, False), ROTATED_180),
+    (Orientation(0, True, False), MIRRORED),
+])
+def test_escpos_orientation(orientation, data):
+    # ESC/POS ничего не поворачивает сам - ориентация применяется к растру
+    assert encode("escpos", orientation=orientation) == b"\x1b@\x1dv0\x00\x02\x00\x02\x00" + data + b"\x1dVB\x00"
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+
+from utils.job_log import PrintJob
+from utils.journal import PrintJournal
+from utils.render import LabelParams
+
+PARAMS = LabelParams(100, 75, 1, 1, 203, False)
+
+
+def finished_job(payloads, printer="принтер"):
+    job = PrintJob(printer, PARAMS, 1)
+    job.record["labels"] = len(payloads)
+    job.payloads = payloads
+    job.finish(payload_bytes=sum(len(payload) for payload in payloads))
+    return job
+
+
+def stored_payloads(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+
+def test_labels_stored_once_across_jobs(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = PrintJournal(path)
+    journal.record(finished_job([b"^XA1^XZ", b"^XA2^XZ", b"^XA1^XZ"]))
+    journal.record(finished_job([b"^XA2^XZ", b"^XA3^XZ"]))
+    journal.flush()
+
+    first, second = sorted(journal.find(), key=lambda job: job["id"])
+    assert journal.payloads(first["id"]) == [b"^XA1^XZ", b"^XA2^XZ", b"^XA1^XZ"]
+    assert journal.payloads(second["id"]) == [b"^XA2^XZ", b"^XA3^XZ"]
+    assert first["has_payload"] and second["has_payload"]
+    # Одинаковые этикетки хранятся одной записью, даже если задания целиком различаются
+    assert stored_payloads(path) == 3
+    journal.close()
+
+
+def test_large_job_recorded_without_payloads(tmp_path):
+    journal = PrintJournal(str(tmp_path / "journal.sqlite3"), max_job_payload_bytes=10)
+    journal.record(finished_job([b"^XA" + b"0" * 20 + b"^XZ"]))
+    journal.flush()
+
+    (job,) = journal.find()
+    assert not job["has_payload"]
+    assert journal.payloads(job["id"]) is None
+    journal.close()
+
+
+def test_prune_drops_oldest_payloads(tmp_path):
+    journal = PrintJournal(str(tmp_path / "journal.sqlite3"), max_payload_bytes=60)
+    # Случайные байты не сжимаются: каждое задание больше лимита
+    payloads = [os.urandom(200) for _ in range(5)]
+    for payload in payloads:
+        journal.record(finished_job([payload]))
+    journal.flush()
+
+    # Последнее задание остаётся доступным для повторной печати, старые удалены
+    (job,) = journal.find()
+    assert journal.payloads(job["id"]) == [payloads[-1]]
+    journal.close()
@@ -0,0 +1,31 @@
+from utils.label_doc import BarcodeElement, LabelDocument, TextElement, compile_zpl
+from utils.render import LabelParams
+
+DPI = 254
+
+
+def compile_single(element):
+    document = LabelDocument(10, 5, [element])
+    return compile_zpl(document, DPI)
+
+
+def test_text_escapes_backslash_before_line_breaks():
+    zpl = compile_single(TextElement(0, 0, 10, 5, "a\\b\nc_^~", 1))
+    assert b"^FH^FDa\\\\b\\&c_5F_5E_7E^FS" in zpl
+
+
+def test_barcode_escapes_right_arrow():
+    zpl = compile_single(BarcodeElement(0, 0, "A>B\\_", 2))
+    assert b"^FH^FDA>0B\\_5F^FS" in zpl
+
+
+def test_document_fits_label_size():
+    document = LabelDocument(100, 75)
+    assert document.fits(LabelParams(100, 75, 1, 1, 203, False))
+    assert not document.fits(LabelParams(58, 40, 1, 1, 203, False))
+
+
+def test_encoding_reset_before_end_of_format():
+    zpl = compile_single(TextElement(0, 0, 10, 5, "текст", 1))
+    assert b"^CI28" in zpl
+    assert zpl.endswith(b"^CI0^XZ")
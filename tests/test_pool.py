@@ -0,0 +1,156 @@
+import socket
+import threading
+import time
+
+import pytest
+from PyQt5.QtCore import Qt
+
+from utils.fake_printer import FakePrinterServer
+from utils.pool import PrinterPool, split_batch
+
+
+def dead_address():
+    """Адрес, на котором никто не слушает: порт занимается и сразу освобождается"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        host, port = sock.getsockname()
+    return f"{host}:{port}"
+
+
+def zpl_labels(count):
+    return [f"^XA^FD{index}^FS^XZ".encode("ascii") for index in range(count)]
+
+
+class PoolResult:
+    """Сигналы пула, принятые прямо в потоке отправки"""
+
+    def __init__(self, pool):
+        self.finished = []
+        self.failed = []
+        self.done = threading.Event()
+        pool.job_finished.connect(self._on_finished, Qt.DirectConnection)
+        pool.job_failed.connect(self._on_failed, Qt.DirectConnection)
+
+    def _on_finished(self, token, send_ms):
+        self.finished.append(token)
+        self.done.set()
+
+    def _on_failed(self, token, error):
+        self.failed.append((token, error))
+        self.done.set()
+
+    def wait(self, timeout=10):
+        assert self.done.wait(timeout), "пул не завершил задание"
+
+
+@pytest.mark.parametrize("count, depths, expected", [
+    (10, [0, 0], [5, 5]),
+    (10, [0, 4], [7, 3]),
+    (3, [0, 10], [3, 0]),
+    (7, [2, 2, 2], [3, 2, 2]),
+    (0, [1, 0], [0, 0]),
+    (5, [], []),
+])
+def test_split_batch(count, depths, expected):
+    assert split_batch(count, depths) == expected
+
+
+def test_split_batch_keeps_every_label():
+    for count in range(50):
+        shares = split_batch(count, [3, 0, 7, 1])
+        assert sum(shares) == count
+        assert min(shares) >= 0
+
+
+def test_failover_to_live_printer(qt_app):
+    with FakePrinterServer() as server:
+        pool = PrinterPool("пул", {"мёртвый": dead_address(), "живой": server.address})
+        result = PoolResult(pool)
+        acked = []
+        pool.submit(zpl_labels(10), "задание", on_sent=acked.extend)
+
+        result.wait()
+        assert result.finished == ["задание"]
+        assert result.failed == []
+        assert sorted(acked) == list(range(10))
+        # Этикетка подтверждается только после того, как принтер принял пачку и закрыл соединение
+        assert server.labels_count == 10
+
+    dead = next(member for member in pool.members if member.name == "мёртвый")
+    assert not dead.online
+    assert all(member.pending == 0 for member in pool.members)
+
+
+def test_all_printers_dead_fails_job(qt_app):
+    pool = PrinterPool("пул", {"первый": dead_address(), "второй": dead_address()})
+    result = PoolResult(pool)
+    pool.submit(zpl_labels(4), "задание")
+
+    result.wait()
+    assert result.finished == []
+    assert len(result.failed) == 1
+    token, error = result.failed[0]
+    assert token == "задание"
+    assert "нет доступных принтеров" in error
+
+
+def test_live_members_uses_cached_status(qt_app):
+    pool = PrinterPool("пул", {"первый": dead_address(), "второй": dead_address()})
+    first, second = pool.members
+    first.online, first.checked_at = False, time.monotonic()
+    second.online, second.checked_at = False, time.monotonic() - pool.STATUS_TTL_S - 1
+
+    # Недавно проверенный недоступный принтер пропускается, устаревший статус проверит поток отправки
+    assert pool.live_members() == [second]
+    assert pool.live_members([second]) == []
+
+
+def test_worker_survives_unexpected_error(qt_app):
+    with FakePrinterServer() as server:
+        pool = PrinterPool("пул", {"живой": server.address})
+        result = PoolResult(pool)
+
+        def broken_ack(index):
+            raise RuntimeError("сбой подтверждения")
+
+        pool.submit(zpl_labels(2), "первое", on_sent=broken_ack)
+        result.wait()
+        assert result.failed and result.failed[0][0] == "первое"
+
+        result.done.clear()
+        pool.submit(zpl_labels(2), "второе")
+        result.wait()
+        assert result.finished == ["второе"]
+
+    member = pool.members[0]
+    assert member.pending == 0
+
+
+def test_idle_worker_exits(qt_app):
+    with FakePrinterServer() as server:
+        pool = PrinterPool("пул", {"живой": server.address})
+        pool.WORKER_IDLE_S = 0.05
+        result = PoolResult(pool)
+        pool.submit(zpl_labels(1), "задание")
+        result.wait()
+
+        member = pool.members[0]
+        deadline = time.monotonic() + 5
+        while member.thread is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert member.thread is None
+
+
+def test_ack_error_does_not_resend(qt_app):
+    with FakePrinterServer() as server:
+        pool = PrinterPool("пул", {"живой": server.address})
+        result = PoolResult(pool)
+
+        def failing_ack(indices):
+            raise OSError("диск переполнен")
+
+        pool.submit(zpl_labels(3), "задание", on_sent=failing_ack)
+        result.wait()
+        assert result.finished == ["задание"]
+        # Принтер принял этикетки: ошибка записи подтверждения не приводит к повторной отправке
+        assert server.labels_count == 3
@@ -0,0 +1,61 @@
+import os
+
+from utils.spool import ACK_RECORD, PrintSpool
+
+
+def labels(count):
+    return [f"^XA^FD{index}^FS^XZ".encode("ascii") for index in range(count)]
+
+
+def test_commit_ack_pending_round_trip(tmp_path):
+    spool = PrintSpool(str(tmp_path))
+    entry = spool.commit("Zebra", labels(5), {"template": "a.png"})
+    entry.ack(range(0, 2))
+    entry.close()
+
+    (restored,) = PrintSpool(str(tmp_path)).pending()
+    assert restored.printer == "Zebra"
+    assert restored.meta["template"] == "a.png"
+    assert restored.acked == {0, 1}
+    assert restored.remaining() == list(enumerate(labels(5)))[2:]
+
+
+def test_torn_last_ack_record_is_ignored(tmp_path):
+    spool = PrintSpool(str(tmp_path))
+    entry = spool.commit("Zebra", labels(3))
+    entry.ack([0])
+    entry.close()
+    # Запись подтверждения оборвалась на середине
+    with open(entry.ack_path, "ab") as f:
+        f.write(ACK_RECORD.pack(1)[:2])
+
+    (restored,) = spool.pending()
+    assert restored.acked == {0}
+    assert [index for index, _ in restored.remaining()] == [1, 2]
+
+
+def test_pending_removes_unfinished_segments(tmp_path):
+    tmp_file = tmp_path / "0000000007.spool.tmp"
+    tmp_file.write_bytes(b"ZSPL")
+
+    assert PrintSpool(str(tmp_path)).pending() == []
+    assert not tmp_file.exists()
+
+
+def test_fully_acked_and_completed_jobs_leave_no_files(tmp_path):
+    spool = PrintSpool(str(tmp_path))
+    acked = spool.commit("Zebra", labels(2))
+    acked.ack(range(2))
+    acked.close()
+    done = spool.commit("Zebra", labels(2))
+    spool.complete(done)
+
+    assert spool.pending() == []
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_sequence_continues_after_restart(tmp_path):
+    first = PrintSpool(str(tmp_path)).commit("Zebra", labels(1))
+    second = PrintSpool(str(tmp_path)).commit("Zebra", labels(1))
+    assert first.path != second.path
+    assert [entry.path for entry in PrintSpool(str(tmp_path)).pending()] == [first.path, second.path]
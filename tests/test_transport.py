@@ -0,0 +1,35 @@
+import socket
+import threading
+
+from utils.transport import RawTransport
+
+
+def test_batch_counts_as_sent_when_printer_keeps_connection_open():
+    """Принтер прочитал все данные, но не закрыл соединение: пачка не должна уйти повторно"""
+    server = socket.create_server(("127.0.0.1", 0))
+    received = []
+    release = threading.Event()
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                received.append(chunk)
+            release.wait(5)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    host, port = server.getsockname()
+    transport = RawTransport(f"{host}:{port}", timeout=2, close_timeout=0.2)
+    sent = []
+    try:
+        assert transport.send_labels([b"^XA^XZ", b"^XA^XZ"], on_sent=sent.append) == 2
+    finally:
+        release.set()
+        thread.join()
+        server.close()
+    assert sent == [range(0, 2)]
+    assert b"".join(received) == b"^XA^XZ^XA^XZ"
@@ -0,0 +1,125 @@
+from collections import namedtuple
+
+from utils.render import Bitmap
+from utils.utils import optional_numpy
+
+ROTATIONS = (0, 90, 180, 270)
+
+
+class Orientation(namedtuple("Orientation", "rotation mirror invert")):
+    """Ориентация печати: поворот по часовой стрелке, зеркальное отражение, инверсия"""
+
+    @property
+    def is_identity(self):
+        return not self.rotation and not self.mirror and not self.invert
+
+
+NO_ORIENTATION = Orientation(0, False, False)
+
+
+def _tail_mask(bitmap):
+    return (0xFF << (bitmap.bytes_per_row * 8 - bitmap.width)) & 0xFF
+
+
+def _unpack(bitmap):
+    np = optional_numpy()
+    rows = np.frombuffer(bitmap.data, np.uint8, count=bitmap.bytes_per_row * bitmap.height)
+    return np.unpackbits(rows.reshape(bitmap.height, bitmap.bytes_per_row), axis=1)[:, :bitmap.width]
+
+
+def _pack(bits):
+    packed = optional_numpy().packbits(bits, axis=1)
+    height, width = bits.shape
+    return Bitmap(packed.tobytes(), width, height, packed.shape[1])
+
+
+def _unpack_python(bitmap):
+    data = bytes(bitmap.data)
+    rows = []
+    for row in range(bitmap.height):
+        line = data[row * bitmap.bytes_per_row:(row + 1) * bitmap.bytes_per_row]
+        rows.append([(line[x >> 3] >> (7 - (x & 7))) & 1 for x in range(bitmap.width)])
+    return rows
+
+
+def _pack_python(rows):
+    height, width = len(rows), len(rows[0]) if rows else 0
+    bytes_per_row = (width + 7) // 8
+    data = bytearray(bytes_per_row * height)
+    for y, row in enumerate(rows):
+        base = y * bytes_per_row
+        for x, bit in enumerate(row):
+            if bit:
+                data[base + (x >> 3)] |= 0x80 >> (x & 7)
+    return Bitmap(bytes(data), width, height, bytes_per_row)
+
+
+def rotate_bitmap(bitmap, rotation):
+    """Поворот упакованного растра на 90/180/270 градусов по часовой стрелке"""
+    if rotation not in ROTATIONS:
+        raise ValueError(f"Неверный угол поворота: {rotation}. Допустимо: {', '.join(map(str, ROTATIONS))}")
+    if rotation == 0:
+        return bitmap
+
+    # Без numpy преобразования идут построчно в Python (медленно, но верно)
+    np = optional_numpy()
+    if np is not None:
+        return _pack(np.rot90(_unpack(bitmap), k=-rotation // 90))
+
+    rows = _unpack_python(bitmap)
+    if rotation == 180:
+        return _pack_python([row[::-1] for row in reversed(rows)])
+    if rotation == 90:
+        return _pack_python([list(column) for column in zip(*reversed(rows))])
+    return _pack_python([list(column) for column in reversed(list(zip(*rows)))])
+
+
+def mirror_bitmap(bitmap):
+    """Зеркальное отражение по горизонтали"""
+    if optional_numpy() is not None:
+        return _pack(_unpack(bitmap)[:, ::-1])
+    return _pack_python([row[::-1] for row in _unpack_python(bitmap)])
+
+
+def invert_bitmap(bitmap):
+    """Инверсия: черное становится белым (биты выравнивания остаются нулевыми)"""
+    tail_mask = _tail_mask(bitmap)
+    np = optional_numpy()
+    if np is not None:
+        rows = np.frombuffer(bitmap.data, np.uint8, count=bitmap.bytes_per_row * bitmap.height)
+        rows = (~rows).reshape(bitmap.height, bitmap.bytes_per_row)
+        rows[:, -1] &= tail_mask
+        return bitmap._replace(data=rows.tobytes())
+
+    data = bytearray(byte ^ 0xFF for byte in bytes(bitmap.data))
+    for row in range(bitmap.height):
+        data[(row + 1) * bitmap.bytes_per_row - 1] &= tail_mask
+    return bitmap._replace(data=bytes(data))
+
+
+def split_orientation(orientation, printer_rotations=(), printer_mirror=False, printer_invert=False):
+    """
+    Делит ориентацию на часть, которую выполнит принтер своими командами, и часть для растра
+
+    Возвращает (программная, принтерная) ориентации
+    """
+    rotation_on_printer = orientation.rotation in printer_rotations
+    mirror_on_printer = printer_mirror and orientation.mirror
+    invert_on_printer = printer_invert and orientation.invert
+    software = Orientation(
+        0 if rotation_on_printer else orientation.rotation,
+        orientation.mirror and not mirror_on_printer,
+        orientation.invert and not invert_on_printer,
+    )
+    printer = Orientation(orientation.rotation if rotation_on_printer else 0, mirror_on_printer, invert_on_printer)
+    return software, printer
+
+
+def orient_bitmap(bitmap, orientation):
+    """Применяет ориентацию: сначала поворот, затем отражение и инверсия"""
+    bitmap = rotate_bitmap(bitmap, orientation.rotation)
+    if orientation.mirror:
+        bitmap = mirror_bitmap(bitmap)
+    if orientation.invert:
+        bitmap = invert_bitmap(bitmap)
+    return bitmap
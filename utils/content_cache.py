@@ -0,0 +1,291 @@
+"""
+Кэш отрисованных этикеток и миниатюр по хэшу содержимого
+
+Два уровня: локальная папка в данных пользователя и (необязательно) общая папка на сетевом
+диске, настройка "shared_cache_dir". Ключ - хэш содержимого шаблона и параметров, поэтому
+одинаковые файлы на разных станциях дают один ключ, и шаблон отрисовывается один раз на все
+станции. Файлы пишутся атомарно (временный файл и переименование), найденное в общей папке
+копируется в локальную.
+
+Общая папка читается только из фоновых потоков (предрендер, миниатюры): GUI-поток смотрит лишь
+локальный уровень (shared=False). Запись в общую папку идёт в отдельном потоке.
+"""
+import hashlib
+import json
+import os
+import queue
+import struct
+import threading
+import uuid
+import zlib
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QRect
+from PyQt5.QtGui import QImage
+from loguru import logger
+
+from utils.prerender import RenderedLabel
+from utils.render import Bitmap, LabelPage
+from utils.utils import file_hash, get_data_path
+
+CACHE_DIR = "cache"
+# Версия формата входит в ключ: при изменении рендеринга старые записи просто не находятся
+CACHE_VERSION = 1
+LABEL_HEADER = struct.Struct("<4sI")
+LABEL_MAGIC = b"ZRLB"
+
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+def content_hash(path):
+    """Хэш содержимого файла; пересчитывается только при изменении размера или времени изменения"""
+    stat = os.stat(path)
+    signature = (path, stat.st_size, stat.st_mtime_ns)
+    with _hashes_lock:
+        digest = _hashes.get(signature)
+    if digest is None:
+        digest = file_hash(path)
+        with _hashes_lock:
+            _hashes[signature] = digest
+    return digest
+
+
+def _key(*parts):
+    return hashlib.sha1("|".join(str(part) for part in (CACHE_VERSION,) + parts).encode("utf-8")).hexdigest()
+
+
+def label_key(image_path, params, part):
+    """Страница (part="page") и растр (part="bitmap") хранятся отдельно: запись по ключу не меняется"""
+    return _key("label", part, content_hash(image_path), *params)
+
+
+def thumbnail_key(image_path, size):
+    return _key("thumbnail", content_hash(image_path), size)
+
+
+def dump_label(rendered):
+    """Упаковывает RenderedLabel (страницу и/или растр) в байты"""
+    meta, blocks = {}, []
+    page = rendered.page
+    if page is not None:
+        image = page.image.convertToFormat(QImage.Format_Grayscale8)
+        fill_rect = page.fill_rect
+        meta["page"] = {
+            "width": image.width(), "height": image.height(), "bytes_per_line": image.bytesPerLine(),
+            "x": page.x, "y": page.y,
+            "fill_rect": [fill_rect.x(), fill_rect.y(), fill_rect.width(), fill_rect.height()] if fill_rect else None,
+        }
+        blocks.append(image.constBits().asstring(image.sizeInBytes()))
+    bitmap = rendered.bitmap
+    if bitmap is not None:
+        meta["bitmap"] = {"width": bitmap.width, "height": bitmap.height, "bytes_per_row": bitmap.bytes_per_row}
+        blocks.append(bytes(bitmap.data))
+    meta["sizes"] = [len(block) for block in blocks]
+
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    return LABEL_HEADER.pack(LABEL_MAGIC, len(meta_bytes)) + meta_bytes + zlib.compress(b"".join(blocks), 1)
+
+
+def load_label(data):
+    """Обратное к dump_label: (LabelPage или None, Bitmap или None)"""
+    magic, meta_size = LABEL_HEADER.unpack_from(data)
+    if magic != LABEL_MAGIC:
+        raise ValueError("неизвестный формат этикетки в кэше")
+    meta = json.loads(data[LABEL_HEADER.size:LABEL_HEADER.size + meta_size])
+    payload = zlib.decompress(data[LABEL_HEADER.size + meta_size:])
+
+    blocks, offset = [], 0
+    for size in meta["sizes"]:
+        blocks.append(payload[offset:offset + size])
+        offset += size
+
+    page = bitmap = None
+    if "page" in meta:
+        info = meta["page"]
+        # copy() отвязывает изображение от буфера bytes
+        image = QImage(blocks.pop(0), info["width"], info["height"], info["bytes_per_line"],
+                       QImage.Format_Grayscale8).copy()
+        fill_rect = QRect(*info["fill_rect"]) if info["fill_rect"] else None
+        page = LabelPage(image, info["x"], info["y"], fill_rect)
+    if "bitmap" in meta:
+        info = meta["bitmap"]
+        bitmap = Bitmap(blocks.pop(0), info["width"], info["height"], info["bytes_per_row"])
+    return page, bitmap
+
+
+def dump_image(image):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+def load_image_data(data):
+    image = QImage.fromData(data, "PNG")
+    return None if image.isNull() else image
+
+
+class ContentStore:
+    """Папка с файлами по ключу (подпапки по первым двум символам), запись атомарная"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Уникальное имя временного файла: в общую папку могут писать несколько станций сразу
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def prune(self, max_bytes):
+        """Удаляет самые старые файлы, пока папка больше max_bytes"""
+        files, total = [], 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class ContentCache:
+    """Локальный уровень и общий уровень на сетевом диске; ошибки общего уровня не мешают печати"""
+
+    # Записи, ждущие отправки в общую папку; при медленной сети лишние пропускаются (это только кэш)
+    SHARED_QUEUE_SIZE = 256
+
+    def __init__(self, local_dir=None, shared_dir=None, max_local_bytes=512 * 1024 * 1024):
+        self.local = ContentStore(local_dir or get_data_path(CACHE_DIR))
+        self.shared = ContentStore(shared_dir) if shared_dir else None
+        self.max_local_bytes = max_local_bytes
+        self._shared_writes = queue.Queue(self.SHARED_QUEUE_SIZE)
+        if self.shared is not None:
+            threading.Thread(target=self._write_shared, name="shared-cache", daemon=True).start()
+
+    def get(self, key, shared=True):
+        """Данные по ключу или None; shared=False - только локальный уровень (без обращения к сети)"""
+        data = self.local.get(key)
+        if data is not None or self.shared is None or not shared:
+            return data
+        try:
+            data = self.shared.get(key)
+        except OSError as e:
+            logger.warning(f"Общий кэш недоступен: {e}")
+            return None
+        if data is not None:
+            # Копия в локальный кэш: следующее чтение не пойдёт в сеть
+            self._put_local(key, data)
+        return data
+
+    def put(self, key, data):
+        """Пишет в локальный уровень сразу, в общий - в фоновом потоке"""
+        self._put_local(key, data)
+        if self.shared is None:
+            return
+        try:
+            self._shared_writes.put_nowait((key, data))
+        except queue.Full:
+            logger.debug(f"Очередь записи в общий кэш переполнена, запись {key} пропущена")
+
+    def flush(self):
+        """Дожидается записи в общий кэш всего, что уже поставлено в очередь"""
+        self._shared_writes.join()
+
+    def _write_shared(self):
+        while True:
+            key, data = self._shared_writes.get()
+            try:
+                if not self.shared.contains(key):
+                    self.shared.put(key, data)
+            except OSError as e:
+                logger.warning(f"Не удалось записать в общий кэш: {e}")
+            finally:
+                self._shared_writes.task_done()
+
+    def _put_new(self, key, dump):
+        """Записывает dump(), если записи ещё нет локально: данные по ключу не меняются"""
+        if not self.local.contains(key):
+            self.put(key, dump())
+
+    def _put_local(self, key, data):
+        try:
+            self.local.put(key, data)
+        except OSError as e:
+            logger.warning(f"Не удалось записать в локальный кэш: {e}")
+
+    def prune(self):
+        """Ограничивает размер локального кэша (общий чистится администратором)"""
+        self.local.prune(self.max_local_bytes)
+
+    def get_label(self, image_path, params, shared=True):
+        """RenderedLabel из кэша (страница и/или растр) или None"""
+        try:
+            page = bitmap = None
+            data = self.get(label_key(image_path, params, "page"), shared)
+            if data is not None:
+                page, _ = load_label(data)
+            data = self.get(label_key(image_path, params, "bitmap"), shared)
+            if data is not None:
+                _, bitmap = load_label(data)
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Не удалось прочитать этикетку из кэша {image_path}: {e}")
+            return None
+        return RenderedLabel(page, bitmap) if page is not None or bitmap is not None else None
+
+    def put_label(self, image_path, params, rendered):
+        try:
+            if rendered.page is not None:
+                self._put_new(label_key(image_path, params, "page"), lambda: dump_label(RenderedLabel(rendered.page)))
+            if rendered.bitmap is not None:
+                self._put_new(label_key(image_path, params, "bitmap"),
+                              lambda: dump_label(RenderedLabel(None, rendered.bitmap)))
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить этикетку в кэш {image_path}: {e}")
+
+    def get_thumbnail(self, image_path, size, shared=True):
+        try:
+            data = self.get(thumbnail_key(image_path, size), shared)
+        except OSError:
+            return None
+        return load_image_data(data) if data is not None else None
+
+    def put_thumbnail(self, image_path, size, image):
+        try:
+            self._put_new(thumbnail_key(image_path, size), lambda: dump_image(image))
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить миниатюру в кэш {image_path}: {e}")
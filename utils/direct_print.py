@@ -0,0 +1,66 @@
+"""
+Прямая печать без драйвера: растр этикетки, кодирование в команды принтера, спул и отправка
+
+Этим путём печатает окно программы (print_images/print_raw) и его же замеряет бенчмарк
+(benchmarks/bench_print.py). Этапы пишутся в PrintJob под теми же именами, что и в журнале заданий
+"""
+from utils.bitops import orient_bitmap, split_orientation
+from utils.encoders import get_encoder
+from utils.label_doc import compile_zpl
+from utils.prerender import RenderedLabel
+from utils.render import compose_label, load_grayscale, pack_bitmap, render_label, to_monochrome
+
+
+def render_page(image_path, params, job):
+    """Страница этикетки из файла шаблона (ImageLoadError если файл не загружается)"""
+    with job.stage("load"):
+        image = load_grayscale(image_path, params.target_size_px)
+    with job.stage("scale"):
+        return RenderedLabel(render_label(image, params))
+
+
+def attach_bitmap(rendered, params, job):
+    """Дополняет этикетку упакованным 1-битным растром для прямой печати"""
+    if rendered.bitmap is None:
+        with job.stage("convert"):
+            rendered.bitmap = pack_bitmap(to_monochrome(compose_label(rendered.page, params)))
+    return rendered
+
+
+def encode_labels(labels, language, params, copies, darkness, orientation, job):
+    """
+    Команды принтера для каждой этикетки (RenderedLabel)
+
+    То, что принтер умеет сам (поворот на 180, зеркало, инверсия), уходит командами, остальное - растром
+    """
+    encoder, printer_capabilities = get_encoder(language)
+    software_orientation, printer_orientation = split_orientation(orientation, **printer_capabilities)
+    payloads = []
+    for label in labels:
+        if label.document is not None:
+            # Векторная этикетка: только команды принтера, растр лишь у изображений внутри неё
+            with job.stage("encode"):
+                payloads.append(compile_zpl(label.document, params.dpi, copies, darkness, printer_orientation))
+            continue
+        with job.stage("convert"):
+            bitmap = orient_bitmap(label.bitmap, software_orientation)
+        with job.stage("encode"):
+            payloads.append(encoder(bitmap, copies, darkness, printer_orientation, params.dpi))
+    return payloads
+
+
+def submit_job(spool, sender, printer_name, payloads, job):
+    """
+    Пишет задание в спул и отдаёт этикетки пулу sender (PrinterPool), возвращает SpoolEntry
+
+    Отправка идёт в потоках принтеров; задание завершится сигналом пула job_finished/job_failed с job
+    """
+    # Этикетки не склеиваются в один буфер: у большого задания это удвоило бы память
+    job.payloads = payloads
+    job.record["payload_bytes"] = sum(len(payload) for payload in payloads)
+    # Задание пишется на диск до отправки, чтобы после сбоя допечатать только неотправленные этикетки
+    with job.stage("spool"):
+        entry = spool.commit(printer_name, payloads, {"template": job.record["template"]})
+    job.spool_entry = entry
+    sender.submit(payloads, job, on_sent=entry.ack)
+    return entry
@@ -0,0 +1,161 @@
+import binascii
+import struct
+
+# Таблица для побайтовой инверсии (bytes.translate работает на скорости C)
+INVERT_TABLE = bytes(byte ^ 0xFF for byte in range(256))
+
+
+# Что Zebra умеет сама: поворот на 180 (^POI), зеркало (^PMY), инверсия полей (^LRY)
+ZPL_ORIENTATION = {"printer_rotations": (180,), "printer_mirror": True, "printer_invert": True}
+
+
+def zpl_header(width, height, darkness=None, orientation=None):
+    """Начало формата ZPL: плотность, ориентация на стороне принтера, размер этикетки в точках"""
+    header = ["^XA"]
+    if darkness is not None:
+        # Плотность печати Zebra 0-30
+        header.append(f"~SD{int(darkness):02d}")
+    # Ориентация - постоянная настройка принтера: каждое задание задаёт её явно, иначе обычное
+    # задание после перевёрнутого (зеркального, инверсного) напечатается так же
+    header.append("^POI" if orientation is not None and orientation.rotation == 180 else "^PON")
+    header.append("^PMY" if orientation is not None and orientation.mirror else "^PMN")
+    header.append("^LRY" if orientation is not None and orientation.invert else "^LRN")
+    header.append(f"^PW{width}^LL{height}")
+    return "".join(header)
+
+
+def zpl_footer(copies=1):
+    return f"^PQ{copies}^XZ" if copies > 1 else "^XZ"
+
+
+def zpl_graphic_field(bitmap):
+    """Растр в поле ^GFA (без ^FO и ^FS); hex получается сразу байтами, без промежуточной строки"""
+    total_bytes = bitmap.bytes_per_row * bitmap.height
+    return (f"^GFA,{total_bytes},{total_bytes},{bitmap.bytes_per_row},".encode("ascii")
+            + binascii.hexlify(bitmap.data).upper())
+
+
+def encode_zpl(bitmap, copies=1, darkness=None, orientation=None, dpi=None):
+    """
+    Кодирует монохромную этикетку в ZPL: графическое поле ^GFA во весь размер этикетки
+
+    orientation - часть ориентации, выполняемая принтером (см. ZPL_ORIENTATION); dpi не нужен,
+    размер задаётся в точках
+    """
+    return b"".join([
+        zpl_header(bitmap.width, bitmap.height, darkness, orientation).encode("ascii"),
+        b"^FO0,0",
+        zpl_graphic_field(bitmap),
+        b"^FS",
+        zpl_footer(copies).encode("ascii"),
+    ])
+
+
+def _inverted_data(bitmap):
+    """Данные растра, где бит 0 - черная точка; биты выравнивания становятся белыми"""
+    return bytes(bitmap.data).translate(INVERT_TABLE)
+
+
+def _darkness_0_15(darkness):
+    """Плотность Zebra 0-30 в шкалу 0-15 (EPL, TSPL)"""
+    return max(0, min(15, round(int(darkness) / 2)))
+
+
+# Зазор между этикетками для датчика EPL- и TSPL-принтеров
+LABEL_GAP_MM = 2
+DEFAULT_DPI = 203
+
+
+def _dots_to_mm(dots, dpi):
+    return f"{round(dots * 25.4 / dpi, 1):g}"
+
+
+def _mm_to_dots(mm, dpi):
+    return round(mm * dpi / 25.4)
+
+
+# EPL умеет печатать перевёрнуто (ZB), остальное - растром
+EPL_ORIENTATION = {"printer_rotations": (180,)}
+
+
+def encode_epl(bitmap, copies=1, darkness=None, orientation=None, dpi=None):
+    """
+    Кодирует этикетку в EPL2: команда GW с двоичными данными (в EPL бит 0 - черная точка)
+
+    Длина этикетки (Q) задаётся по высоте растра: иначе принтер подаёт этикетку по длине из
+    прошлого задания или калибровки
+    """
+    data = _inverted_data(bitmap)
+    commands = [b"\nN\n"]
+    if darkness is not None:
+        commands.append(f"D{_darkness_0_15(darkness)}\n".encode("ascii"))
+    commands.append(b"ZB\n" if orientation is not None and orientation.rotation == 180 else b"ZT\n")
+    gap = _mm_to_dots(LABEL_GAP_MM, dpi or DEFAULT_DPI)
+    commands.append(f"q{bitmap.width}\nQ{bitmap.height},{gap}\n".encode("ascii"))
+    commands.append(f"GW0,0,{bitmap.bytes_per_row},{bitmap.height},".encode("ascii"))
+    commands.append(data)
+    commands.append(f"\nP{copies}\n".encode("ascii"))
+    return b"".join(commands)
+
+
+# TSPL: DIRECTION 1 - поворот на 180, второй параметр - зеркало
+TSPL_ORIENTATION = {"printer_rotations": (180,), "printer_mirror": True}
+
+
+def encode_tspl(bitmap, copies=1, darkness=None, orientation=None, dpi=None):
+    """
+    Кодирует этикетку в TSPL: команда BITMAP (в TSPL бит 0 - черная точка)
+
+    Размер этикетки (SIZE) и зазор (GAP) задаются явно: без них принтер печатает по размеру
+    прошлого задания; dpi нужен, чтобы перевести размер растра в миллиметры
+    """
+    dpi = dpi or DEFAULT_DPI
+    data = _inverted_data(bitmap)
+    direction = 1 if orientation is not None and orientation.rotation == 180 else 0
+    mirror = 1 if orientation is not None and orientation.mirror else 0
+    commands = [f"SIZE {_dots_to_mm(bitmap.width, dpi)} mm,{_dots_to_mm(bitmap.height, dpi)} mm\r\n"
+                f"GAP {LABEL_GAP_MM} mm,0 mm\r\n".encode("ascii")]
+    if darkness is not None:
+        commands.append(f"DENSITY {_darkness_0_15(darkness)}\r\n".encode("ascii"))
+    commands.append(f"DIRECTION {direction},{mirror}\r\nCLS\r\n".encode("ascii"))
+    commands.append(f"BITMAP 0,0,{bitmap.bytes_per_row},{bitmap.height},0,".encode("ascii"))
+    commands.append(data)
+    commands.append(f"\r\nPRINT 1,{copies}\r\n".encode("ascii"))
+    return b"".join(commands)
+
+
+# ESC/POS не умеет поворачивать растр - всё делается битовыми операциями
+ESCPOS_ORIENTATION = {}
+
+
+# GS V 66 0: подача бумаги до ножа и частичный отрез
+ESCPOS_CUT = b"\x1dVB\x00"
+
+
+def encode_escpos(bitmap, copies=1, darkness=None, orientation=None, dpi=None):
+    """Кодирует этикетку в ESC/POS: растровая команда GS v 0 (бит 1 - черная точка), плотность не поддерживается"""
+    raster = b"".join([
+        b"\x1dv0\x00",
+        struct.pack("<HH", bitmap.bytes_per_row, bitmap.height),
+        bytes(bitmap.data),
+    ])
+    # ESC @ - сброс настроек принтера; каждая копия отрезается отдельно
+    return b"\x1b@" + (raster + ESCPOS_CUT) * copies
+
+
+# Языки принтеров: имя -> (кодировщик, что ориентации выполняет сам принтер)
+ENCODERS = {
+    "zpl": (encode_zpl, ZPL_ORIENTATION),
+    "epl": (encode_epl, EPL_ORIENTATION),
+    "tspl": (encode_tspl, TSPL_ORIENTATION),
+    "escpos": (encode_escpos, ESCPOS_ORIENTATION),
+}
+DEFAULT_ENCODER = "zpl"
+
+
+def get_encoder(language):
+    """Кодировщик и принтерная часть ориентации для языка принтера"""
+    try:
+        return ENCODERS[language]
+    except KeyError:
+        raise ValueError(f"Неизвестный язык принтера: {language}. Доступны: {', '.join(ENCODERS)}")
@@ -0,0 +1,58 @@
+import socketserver
+import threading
+
+
+class FakePrinterServer:
+    """Локальный TCP-сервер, имитирующий RAW-порт принтера (для бенчмарков и отладки)"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        received = self.received = []
+        lock = self.lock = threading.Lock()
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                chunks = []
+                while True:
+                    chunk = self.request.recv(1 << 16)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                with lock:
+                    received.append(b"".join(chunks))
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address
+        return f"{host}:{port}"
+
+    @property
+    def received_bytes(self):
+        with self.lock:
+            return sum(len(data) for data in self.received)
+
+    @property
+    def labels_count(self):
+        """Число полученных этикеток ZPL (по концу формата ^XZ)"""
+        with self.lock:
+            return sum(data.count(b"^XZ") for data in self.received)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,62 @@
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QImageIOHandler, QImageReader
+from loguru import logger
+
+# Больше этого не открываем вовсе: такие файлы - почти наверняка ошибка выбора
+MAX_SOURCE_PIXELS = 400_000_000
+# Форматы без уменьшенного декодирования (PNG, BMP, GIF) раскрываются целиком, поэтому лимит строже
+MAX_FULL_DECODE_PIXELS = 80_000_000
+# Форматы, которые декодер умеет сразу раскрывать в уменьшенном масштабе
+SCALED_DECODE_FORMATS = (b"jpeg", b"jpg")
+
+
+class ImageLoadError(ValueError):
+    """Изображение не удалось загрузить или оно слишком большое"""
+
+
+def read_image_size(image_path):
+    """Размер изображения по заголовку файла, без декодирования"""
+    reader = QImageReader(image_path)
+    size = reader.size()
+    if not size.isValid():
+        raise ImageLoadError(f"Не удалось прочитать изображение: {image_path} ({reader.errorString()})")
+    return size
+
+
+def load_image(image_path, target_size=None):
+    """
+    Загружает изображение, сразу уменьшая его при декодировании до размера этикетки
+
+    target_size - (ширина, высота) в пикселях; изображение декодируется не меньше этого размера
+    по обеим сторонам, чтобы дальнейшее сглаженное масштабирование не теряло качество
+    """
+    reader = QImageReader(image_path)
+    size = reader.size()
+    if not size.isValid():
+        raise ImageLoadError(f"Не удалось прочитать изображение: {image_path} ({reader.errorString()})")
+
+    pixels = size.width() * size.height()
+    if pixels > MAX_SOURCE_PIXELS:
+        raise ImageLoadError(
+            f"Изображение слишком большое: {image_path} ({size.width()}x{size.height()}, "
+            f"{pixels / 1_000_000:.0f} Мп, допустимо {MAX_SOURCE_PIXELS / 1_000_000:.0f} Мп)")
+
+    target = QSize(*target_size) if target_size is not None else None
+    if target is not None and size.width() > target.width() and size.height() > target.height():
+        if reader.supportsOption(QImageIOHandler.ScaledSize):
+            # JPEG декодируется сразу в уменьшенном масштабе (DCT-масштабирование libjpeg),
+            # остальные форматы хотя бы не держат полноразмерную копию после чтения
+            reader.setScaledSize(size.scaled(target, Qt.KeepAspectRatioByExpanding))
+            logger.debug(f"Уменьшенное декодирование {image_path}: {size.width()}x{size.height()} -> "
+                         f"{reader.scaledSize().width()}x{reader.scaledSize().height()}")
+
+    scaled_decode = reader.scaledSize().isValid() and bytes(reader.format()).lower() in SCALED_DECODE_FORMATS
+    if not scaled_decode and pixels > MAX_FULL_DECODE_PIXELS:
+        raise ImageLoadError(
+            f"Изображение слишком большое для загрузки: {image_path} ({size.width()}x{size.height()}). "
+            f"Уменьшите его или сохраните в JPEG")
+
+    image = reader.read()
+    if image.isNull():
+        raise ImageLoadError(f"Не удалось загрузить изображение: {image_path} ({reader.errorString()})")
+    return image
@@ -0,0 +1,212 @@
+import os
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from loguru import logger
+
+from utils.content_cache import content_hash
+from utils.image_loader import MAX_SOURCE_PIXELS, ImageLoadError, load_image, read_image_size
+from utils.utils import IMAGE_EXTENSIONS, THUMBNAIL_SIZE
+
+# Файлы проверяются пачками: тысячи файлов не превращаются в тысячи задач и сигналов
+PROBE_CHUNK = 32
+
+
+class ImportedImage(namedtuple("ImportedImage", "path width height content_hash")):
+    """Проверенное изображение: размер по заголовку и хэш содержимого"""
+
+
+def collect_image_paths(paths):
+    """Раскрывает папки (рекурсивно) в список файлов изображений, порядок сохраняется"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                result.extend(os.path.join(root, name) for name in sorted(names)
+                              if name.lower().endswith(IMAGE_EXTENSIONS))
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            result.append(path)
+    return result
+
+
+def probe_image(image_path):
+    """Проверяет файл без декодирования: читается ли заголовок и допустим ли размер"""
+    size = read_image_size(image_path)
+    pixels = size.width() * size.height()
+    if pixels > MAX_SOURCE_PIXELS:
+        raise ImageLoadError(f"Изображение слишком большое: {image_path} ({size.width()}x{size.height()})")
+    return ImportedImage(image_path, size.width(), size.height(), content_hash(image_path))
+
+
+class _CollectTask(QRunnable):
+    def __init__(self, importer, generation, paths):
+        super().__init__()
+        self.importer = importer
+        self.generation = generation
+        self.paths = paths
+
+    def run(self):
+        paths = collect_image_paths(self.paths)
+        self.importer.collected.emit(self.generation, paths)
+
+
+class _ProbeTask(QRunnable):
+    def __init__(self, importer, generation, chunk_index, paths):
+        super().__init__()
+        self.importer = importer
+        self.generation = generation
+        self.chunk_index = chunk_index
+        self.paths = paths
+
+    def run(self):
+        results = []
+        for path in self.paths:
+            if self.generation != self.importer.generation:
+                return
+            try:
+                results.append((path, probe_image(path), None))
+            except (OSError, ImageLoadError) as e:
+                results.append((path, None, str(e)))
+        self.importer.probed.emit(self.generation, self.chunk_index, results)
+
+
+class ImageImporter(QObject):
+    """
+    Фоновый импорт большого числа изображений (папки, перетаскивание)
+
+    Папки обходятся, заголовки читаются и файлы хэшируются в пуле потоков без полного декодирования. Результаты
+    приходят в GUI-поток в исходном порядке файлов: image_ready для каждого нового изображения,
+    finished в конце с числом дубликатов и списком ошибок (путь, текст)
+    """
+
+    image_ready = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, list)
+    probed = pyqtSignal(int, int, list)
+    collected = pyqtSignal(int, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self.probed.connect(self._on_probed, Qt.QueuedConnection)
+        self.collected.connect(self._on_collected, Qt.QueuedConnection)
+        self._reset()
+
+    def _reset(self):
+        self._collecting = 0
+        self._total = 0
+        self._done = 0
+        self._pending = {}
+        self._chunks = 0
+        self._next_chunk = 0
+        self._seen_hashes = set()
+        self._duplicates = 0
+        self._errors = []
+
+    @property
+    def is_running(self):
+        return self._collecting > 0 or self._done < self._total
+
+    def start(self, paths, known_hashes=()):
+        """
+        Ставит файлы и папки в импорт; known_hashes - хэши уже добавленных изображений
+
+        Если импорт уже идёт, файлы добавляются к нему, и отчёт будет общим
+        """
+        if not self.is_running:
+            self._reset()
+        self._seen_hashes.update(known_hashes)
+        # Обход папок может занять долго (сетевой диск, тысячи файлов), поэтому он тоже идёт в пуле;
+        # число файлов становится известно в _on_collected
+        self._collecting += 1
+        self._thread_pool.start(_CollectTask(self, self.generation, list(paths)))
+
+    def cancel(self):
+        """Отменяет импорт: поставленные задачи снимаются, результаты отбрасываются"""
+        self.generation += 1
+        self._thread_pool.clear()
+        self._reset()
+
+    def _on_collected(self, generation, paths):
+        if generation != self.generation:
+            return
+        self._collecting -= 1
+        self._total += len(paths)
+        logger.info(f"Импорт изображений: {len(paths)} файлов")
+        for start in range(0, len(paths), PROBE_CHUNK):
+            self._thread_pool.start(_ProbeTask(self, self.generation, self._chunks, paths[start:start + PROBE_CHUNK]))
+            self._chunks += 1
+        self.progress.emit(self._done, self._total)
+        self._finish_if_done()
+
+    def _on_probed(self, generation, chunk_index, results):
+        if generation != self.generation:
+            return
+        # Пачки завершаются в любом порядке, а в список изображения добавляются в порядке файлов
+        self._pending[chunk_index] = results
+        while self._next_chunk in self._pending:
+            chunk = self._pending.pop(self._next_chunk)
+            self._next_chunk += 1
+            for path, image, error in chunk:
+                self._done += 1
+                if error is not None:
+                    self._errors.append((path, error))
+                elif image.content_hash in self._seen_hashes:
+                    self._duplicates += 1
+                else:
+                    self._seen_hashes.add(image.content_hash)
+                    self.image_ready.emit(image)
+        self.progress.emit(self._done, self._total)
+        self._finish_if_done()
+
+    def _finish_if_done(self):
+        if not self.is_running:
+            logger.info(f"Импорт завершён: {self._total} файлов, дубликатов {self._duplicates}, "
+                        f"ошибок {len(self._errors)}")
+            self.finished.emit(self._duplicates, self._errors)
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, image_path):
+        super().__init__()
+        self.loader = loader
+        self.image_path = image_path
+
+    def run(self):
+        cache = self.loader.cache
+        thumbnail = cache.get_thumbnail(self.image_path, THUMBNAIL_SIZE) if cache is not None else None
+        if thumbnail is None:
+            try:
+                thumbnail = load_image(self.image_path, (THUMBNAIL_SIZE, THUMBNAIL_SIZE)).scaled(
+                    THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            except ImageLoadError as e:
+                logger.warning(str(e))
+                return
+            if cache is not None:
+                cache.put_thumbnail(self.image_path, THUMBNAIL_SIZE, thumbnail)
+        self.loader.loaded.emit(self.image_path, thumbnail)
+
+
+class ThumbnailLoader(QObject):
+    """Миниатюры для списка изображений: грузятся в фоне только для видимых строк"""
+
+    loaded = pyqtSignal(str, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(2)
+
+    def request(self, image_paths):
+        """
+        Заменяет очередь: после прокрутки прежние невидимые строки не грузятся
+
+        Строки, у которых миниатюра уже есть, отбирает вызывающий (по пустой иконке строки)
+        """
+        self._thread_pool.clear()
+        for image_path in image_paths:
+            self._thread_pool.start(_ThumbnailTask(self, image_path))
@@ -0,0 +1,133 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from loguru import logger
+
+from utils.content_cache import content_hash
+from utils.utils import get_data_path, log_to_file_only
+
+JOB_LOG_FILE = "jobs.jsonl"
+
+
+class PrintJob:
+    """Запись о задании печати с замерами этапов (load, scale, convert, encode, send/spool)"""
+
+    def __init__(self, printer, params, copies):
+        self.started = time.perf_counter()
+        # Готовые команды принтера по этикеткам (для журнала и повторной печати), если печать шла без драйвера
+        self.payloads = None
+        # Запись в спуле прямой печати (SpoolEntry), удаляется после отправки всех этикеток
+        self.spool_entry = None
+        self.record = {
+            "ts": time.time(),
+            "printer": printer,
+            "template": None,
+            "template_path": None,
+            "template_hash": None,
+            "label_mm": [params.width_mm, params.height_mm],
+            "dpi": params.dpi,
+            "copies": copies,
+            "labels": 0,
+            "payload_bytes": None,
+            "cache": "miss",
+            "stages_ms": {},
+        }
+
+    def set_template(self, image_path):
+        """Запоминает шаблон задания (первую этикетку); хэш берётся из кэша хэшей, файл заново не читается"""
+        if self.record["template_hash"] is None:
+            self.record["template"] = os.path.basename(image_path)
+            self.record["template_path"] = image_path
+            self.record["template_hash"] = content_hash(image_path)
+
+    @contextmanager
+    def stage(self, name):
+        """Замеряет этап; повторные замеры одного этапа суммируются"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, (time.perf_counter() - started) * 1000)
+
+    def add_stage(self, name, duration_ms):
+        stages = self.record["stages_ms"]
+        stages[name] = round(stages.get(name, 0.0) + duration_ms, 3)
+
+    def finish(self, **fields):
+        """Завершает задание, total_ms - полное время от нажатия до отправки"""
+        self.record.update(fields)
+        self.record["total_ms"] = round((time.perf_counter() - self.started) * 1000, 3)
+        return self.record
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+class JobLog:
+    """Журнал заданий: JSONL-файл с ротацией и статистика задержек по принтерам"""
+
+    STATS_WINDOW_S = 600
+
+    def __init__(self, path=None, max_records=5000):
+        self.path = path or get_data_path(JOB_LOG_FILE)
+        self.records = deque(maxlen=max_records)
+        self._history_loaded = False
+        logger.add(
+            self.path,
+            format="{message}",
+            filter=lambda record: record["extra"].get("job_log", False),
+            rotation="10 MB",
+            retention=5,
+            encoding="utf-8",
+        )
+        log_to_file_only("job_log")
+
+    def write(self, job):
+        record = job.record if isinstance(job, PrintJob) else job
+        self.records.append(record)
+        logger.bind(job_log=True).info(json.dumps(record, ensure_ascii=False))
+
+    def load_history(self):
+        """Подгружает записи текущего файла журнала (для статистики после перезапуска)"""
+        if self._history_loaded or not os.path.exists(self.path):
+            return
+        self._history_loaded = True
+
+        # Записи этого сеанса уже есть в файле, поэтому перечитываем его целиком
+        self.records.clear()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self.records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+    def stats(self, now=None):
+        """p50/p95 времени задания и скорость печати (этикеток в минуту) по каждому принтеру"""
+        now = time.time() if now is None else now
+        by_printer = defaultdict(list)
+        for record in self.records:
+            by_printer[record["printer"]].append(record)
+
+        stats = []
+        for printer, records in sorted(by_printer.items()):
+            latencies = [record["total_ms"] for record in records]
+            recent = [record for record in records if now - record["ts"] <= self.STATS_WINDOW_S]
+            span_s = max(60.0, now - min(record["ts"] for record in recent)) if recent else 60.0
+            stats.append({
+                "printer": printer,
+                "jobs": len(records),
+                "labels": sum(record["labels"] * record["copies"] for record in records),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "labels_per_min": sum(record["labels"] * record["copies"] for record in recent) / (span_s / 60),
+            })
+        return stats
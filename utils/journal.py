@@ -0,0 +1,235 @@
+import hashlib
+import json
+import queue
+import threading
+import time
+import zlib
+
+from loguru import logger
+
+from utils.utils import get_data_path
+
+JOURNAL_FILE = "journal.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    printer TEXT NOT NULL,
+    template TEXT,
+    template_hash TEXT,
+    labels INTEGER NOT NULL,
+    copies INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    payload_hash TEXT REFERENCES payloads(hash)
+);
+CREATE TABLE IF NOT EXISTS job_labels (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    position INTEGER NOT NULL,
+    payload_hash TEXT NOT NULL REFERENCES payloads(hash),
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ts ON jobs(ts);
+CREATE INDEX IF NOT EXISTS idx_jobs_template ON jobs(template, ts);
+CREATE INDEX IF NOT EXISTS idx_jobs_printer ON jobs(printer, ts);
+CREATE INDEX IF NOT EXISTS idx_jobs_payload ON jobs(payload_hash);
+CREATE INDEX IF NOT EXISTS idx_job_labels_payload ON job_labels(payload_hash);
+"""
+# Задание целиком в журнале (jobs.payload_hash) - формат прежних версий, читается для повторной печати
+HAS_PAYLOAD = ("(jobs.payload_hash IS NOT NULL "
+               "OR EXISTS (SELECT 1 FROM job_labels WHERE job_labels.job_id = jobs.id))")
+
+
+class PrintJournal:
+    """
+    Журнал заданий печати в SQLite
+
+    Готовые команды принтера хранятся по этикеткам, по хэшу содержимого (одинаковые этикетки
+    разных заданий - одна запись), поэтому повторная печать отправляет сохранённые байты без
+    рендеринга. Хэширование, сжатие и запись идут в отдельном потоке со своим соединением
+    """
+
+    def __init__(self, path=None, max_jobs=20000, max_payload_bytes=256 * 1024 * 1024,
+                 max_job_payload_bytes=64 * 1024 * 1024):
+        self.path = path or get_data_path(JOURNAL_FILE)
+        self.max_jobs = max_jobs
+        self.max_payload_bytes = max_payload_bytes
+        # Команды больших заданий не сохраняются: повторная печать для них недоступна
+        self.max_job_payload_bytes = max_job_payload_bytes
+        self.connection = self._connect()
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="journal", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        # sqlite3 загружается с первым соединением: журнал открывается уже после показа окна
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        # WAL: чтение истории в GUI-потоке не ждёт записи из потока журнала
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def record(self, job):
+        """Ставит завершённое задание (PrintJob) в очередь записи"""
+        self._writes.put((dict(job.record), job.payloads))
+
+    def flush(self):
+        """Дожидается записи заданий, уже поставленных в очередь"""
+        self._writes.join()
+
+    def _write_loop(self):
+        connection = self._connect()
+        while True:
+            item = self._writes.get()
+            try:
+                if item is None:
+                    connection.close()
+                    return
+                self._write(connection, *item)
+            except Exception as e:
+                logger.error(f"Не удалось записать задание в историю: {e}")
+            finally:
+                self._writes.task_done()
+
+    def _write(self, connection, record, payloads):
+        if payloads is not None and sum(len(payload) for payload in payloads) > self.max_job_payload_bytes:
+            logger.info(f"Задание на {record['printer']} слишком большое, команды в историю не сохраняются")
+            payloads = None
+        with connection:
+            job_id = connection.execute(
+                "INSERT INTO jobs (ts, printer, template, template_hash, labels, copies, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record["ts"], record["printer"], record.get("template"), record.get("template_hash"),
+                 record["labels"], record["copies"], json.dumps(record, ensure_ascii=False))
+            ).lastrowid
+            for position, payload in enumerate(payloads or ()):
+                payload_hash = hashlib.sha1(payload).hexdigest()
+                if connection.execute("SELECT 1 FROM payloads WHERE hash = ?", (payload_hash,)).fetchone() is None:
+                    # Команды ZPL в hex хорошо сжимаются
+                    data = zlib.compress(payload, 6)
+                    connection.execute("INSERT INTO payloads (hash, data, size, stored_size) VALUES (?, ?, ?, ?)",
+                                       (payload_hash, data, len(payload), len(data)))
+                connection.execute("INSERT INTO job_labels (job_id, position, payload_hash) VALUES (?, ?, ?)",
+                                   (job_id, position, payload_hash))
+        self._prune(connection)
+
+    def find(self, printer=None, template=None, since=None, until=None, limit=200):
+        """Поиск заданий (новые первыми) по принтеру, шаблону и интервалу времени"""
+        conditions, args = [], []
+        if printer:
+            conditions.append("printer = ?")
+            args.append(printer)
+        if template:
+            conditions.append("template = ?")
+            args.append(template)
+        if since is not None:
+            conditions.append("ts >= ?")
+            args.append(since)
+        if until is not None:
+            conditions.append("ts <= ?")
+            args.append(until)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT id, ts, printer, template, labels, copies, {HAS_PAYLOAD} AS has_payload FROM jobs {where} "
+            f"ORDER BY ts DESC LIMIT ?",
+            args + [limit]
+        )
+        return [dict(row) for row in rows]
+
+    def distinct_values(self, column):
+        """Значения для фильтров (принтеры или шаблоны)"""
+        if column not in ("printer", "template"):
+            raise ValueError(f"Неизвестная колонка журнала: {column}")
+        rows = self.connection.execute(f"SELECT DISTINCT {column} FROM jobs WHERE {column} IS NOT NULL ORDER BY 1")
+        return [row[0] for row in rows]
+
+    def top_templates(self, printer, since=None, limit=10):
+        """
+        Самые частые шаблоны принтера (с since): [(путь, число заданий)]
+
+        Путь берётся из последнего задания с этим шаблоном; для записей без пути - None
+        """
+        args = [printer]
+        condition = ""
+        if since is not None:
+            condition = " AND ts >= ?"
+            args.append(since)
+        rows = self.connection.execute(
+            "SELECT COUNT(*) AS uses, MAX(id) AS last_id FROM jobs "
+            f"WHERE printer = ? AND template_hash IS NOT NULL{condition} "
+            "GROUP BY template_hash ORDER BY uses DESC LIMIT ?",
+            args + [limit]
+        ).fetchall()
+
+        result = []
+        for row in rows:
+            record = self.connection.execute("SELECT record FROM jobs WHERE id = ?", (row["last_id"],)).fetchone()
+            result.append((json.loads(record["record"]).get("template_path"), row["uses"]))
+        return result
+
+    def payloads(self, job_id):
+        """Сохранённые команды принтера по этикеткам задания или None"""
+        rows = self.connection.execute(
+            "SELECT payloads.data FROM job_labels JOIN payloads ON payloads.hash = job_labels.payload_hash "
+            "WHERE job_labels.job_id = ? ORDER BY job_labels.position",
+            (job_id,)
+        ).fetchall()
+        if not rows:
+            rows = self.connection.execute(
+                "SELECT payloads.data FROM jobs JOIN payloads ON payloads.hash = jobs.payload_hash WHERE jobs.id = ?",
+                (job_id,)
+            ).fetchall()
+        return [zlib.decompress(row["data"]) for row in rows] if rows else None
+
+    def _prune(self, connection):
+        """Ограничивает журнал по числу заданий и объёму сохранённых команд"""
+        with connection:
+            connection.execute(
+                "DELETE FROM jobs WHERE id <= (SELECT id FROM jobs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_jobs,)
+            )
+            self._delete_orphans(connection)
+
+            stored = connection.execute("SELECT COALESCE(SUM(stored_size), 0) FROM payloads").fetchone()[0]
+            while stored > self.max_payload_bytes:
+                # Удаляем самые старые задания с командами, пока не уложимся в лимит; последнее
+                # задание остаётся всегда (его размер ограничен max_job_payload_bytes)
+                oldest = connection.execute(
+                    f"SELECT MIN(id) FROM jobs WHERE {HAS_PAYLOAD} AND id < (SELECT MAX(id) FROM jobs)"
+                ).fetchone()[0]
+                if oldest is None:
+                    break
+                connection.execute("DELETE FROM jobs WHERE id = ?", (oldest,))
+                self._delete_orphans(connection)
+                stored = connection.execute("SELECT COALESCE(SUM(stored_size), 0) FROM payloads").fetchone()[0]
+                logger.debug(f"Журнал печати сокращён, объём команд: {stored} байт")
+
+    @staticmethod
+    def _delete_orphans(connection):
+        connection.execute(
+            "DELETE FROM job_labels WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE jobs.id = job_labels.job_id)"
+        )
+        connection.execute(
+            "DELETE FROM payloads WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE jobs.payload_hash = payloads.hash) "
+            "AND NOT EXISTS (SELECT 1 FROM job_labels WHERE job_labels.payload_hash = payloads.hash)"
+        )
+
+    def close(self):
+        """Дописывает очередь и закрывает журнал"""
+        self._writes.put(None)
+        self._writer.join()
+        self.connection.close()
+
+
+def format_job_time(ts):
+    return time.strftime("%d.%m.%Y %H:%M:%S", time.localtime(ts))
@@ -0,0 +1,238 @@
+"""
+Векторная модель этикетки: текст, линии, рамки, изображения и штрихкоды в миллиметрах
+
+Для Zebra документ компилируется в команды ZPL (^FO, ^A0, ^GB, ^BC, ^FD): текст, линии и
+штрихкоды рисует сам принтер, растром (^GFA) уходят только изображения и только своего размера,
+поэтому размер задания и время подготовки зависят от содержимого, а не от площади этикетки.
+Для остальных принтеров документ растеризуется целиком (render_document).
+"""
+from collections import namedtuple
+
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QFont, QImage, QPainter
+
+from utils.encoders import zpl_footer, zpl_graphic_field, zpl_header
+from utils.render import load_grayscale, mm_to_px, pack_bitmap, to_monochrome
+
+
+class TextElement(namedtuple("TextElement", "x_mm y_mm width_mm height_mm text font_height_mm bold font_family")):
+    """Текст с переносом по словам в блоке width_mm x height_mm"""
+
+    def __new__(cls, x_mm, y_mm, width_mm, height_mm, text, font_height_mm, bold=False, font_family=None):
+        return super().__new__(cls, x_mm, y_mm, width_mm, height_mm, text, font_height_mm, bold, font_family)
+
+
+class LineElement(namedtuple("LineElement", "x_mm y_mm length_mm thickness_mm vertical")):
+    """Горизонтальная (или вертикальная) линия"""
+
+    def __new__(cls, x_mm, y_mm, length_mm, thickness_mm, vertical=False):
+        return super().__new__(cls, x_mm, y_mm, length_mm, thickness_mm, vertical)
+
+
+class BoxElement(namedtuple("BoxElement", "x_mm y_mm width_mm height_mm thickness_mm")):
+    """Рамка; при толщине не меньше половины стороны - залитый прямоугольник"""
+
+
+class ImageElement(namedtuple("ImageElement", "x_mm y_mm width_mm height_mm path keep_aspect_ratio")):
+    """Изображение из файла, вписанное в свою область"""
+
+    def __new__(cls, x_mm, y_mm, width_mm, height_mm, path, keep_aspect_ratio=True):
+        return super().__new__(cls, x_mm, y_mm, width_mm, height_mm, path, keep_aspect_ratio)
+
+
+class BarcodeElement(namedtuple("BarcodeElement", "x_mm y_mm data height_mm module_mm human_readable")):
+    """Штрихкод Code 128 (набор B); module_mm - ширина самого узкого штриха"""
+
+    def __new__(cls, x_mm, y_mm, data, height_mm, module_mm=0.33, human_readable=True):
+        return super().__new__(cls, x_mm, y_mm, data, height_mm, module_mm, human_readable)
+
+
+# Расхождение размеров документа и этикетки, которое ещё считается тем же носителем
+SIZE_TOLERANCE_MM = 0.05
+
+
+class LabelDocument:
+    """Этикетка как набор элементов; координаты от левого верхнего угла, в мм"""
+
+    def __init__(self, width_mm, height_mm, elements=None):
+        self.width_mm = width_mm
+        self.height_mm = height_mm
+        self.elements = list(elements or [])
+
+    def add(self, element):
+        self.elements.append(element)
+        return element
+
+    def fits(self, params):
+        """Документ размечен под размер этикетки params: иначе ^PW/^LL и координаты не совпадут с носителем"""
+        return (abs(self.width_mm - params.width_mm) < SIZE_TOLERANCE_MM
+                and abs(self.height_mm - params.height_mm) < SIZE_TOLERANCE_MM)
+
+
+# Code 128: ширины штрихов и пробелов для значений 0-106 (106 - стоп)
+CODE128_PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312", "132212", "221213",
+    "221312", "231212", "112232", "122132", "122231", "113222", "123122", "123221", "223211", "221132",
+    "221231", "213212", "223112", "312131", "311222", "321122", "321221", "312212", "322112", "322211",
+    "212123", "212321", "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121", "313121", "211331",
+    "231131", "213113", "213311", "213131", "311123", "311321", "331121", "312113", "312311", "332111",
+    "314111", "221411", "431111", "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112", "421211", "212141",
+    "214121", "412121", "111143", "111341", "131141", "114113", "114311", "411113", "411311", "113141",
+    "114131", "311141", "411131", "211412", "211214", "211232", "2331112",
+)
+CODE128_START_B = 104
+CODE128_STOP = 106
+
+
+def code128_widths(data):
+    """Ширины штрихов и пробелов (в модулях) для данных в наборе B, начиная со штриха"""
+    values = []
+    for char in data:
+        if not 32 <= ord(char) <= 126:
+            raise ValueError(f"Символ '{char}' нельзя закодировать в Code 128 (допустимы только ASCII)")
+        values.append(ord(char) - 32)
+    checksum = (CODE128_START_B + sum(position * value for position, value in enumerate(values, 1))) % 103
+    codes = [CODE128_START_B] + values + [checksum, CODE128_STOP]
+    return [int(width) for code in codes for width in CODE128_PATTERNS[code]]
+
+
+def _zpl_hex_escape(text):
+    """Служебные символы ZPL для ^FH: подчёркивание (символ ^FH), ^ и ~ передаются кодами"""
+    return text.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+
+
+def _zpl_field_data(text):
+    """
+    Текст поля ^FB для ^FH^FD
+
+    В ^FB обратная косая черта служебная: сама она удваивается, перенос строки передаётся как \\&
+    """
+    escaped = _zpl_hex_escape(text.replace("\\", "\\\\"))
+    return escaped.replace("\r\n", "\n").replace("\n", "\\&")
+
+
+def _zpl_barcode_data(data):
+    """Данные ^BC для ^FH^FD: > начинает управляющий код Code 128, сам символ передаётся как >0"""
+    return _zpl_hex_escape(data.replace(">", ">0"))
+
+
+def render_element_bitmap(element, dpi):
+    """Монохромный растр изображения размером с его область (для ^GFA)"""
+    width_px, height_px = mm_to_px(element.width_mm, dpi), mm_to_px(element.height_mm, dpi)
+    image = load_grayscale(element.path, (width_px, height_px))
+    aspect = Qt.KeepAspectRatio if element.keep_aspect_ratio else Qt.IgnoreAspectRatio
+    image = image.scaled(width_px, height_px, aspect, Qt.SmoothTransformation).convertToFormat(
+        QImage.Format_Grayscale8)
+    return pack_bitmap(to_monochrome(image))
+
+
+def compile_zpl(document, dpi, copies=1, darkness=None, orientation=None):
+    """
+    Компилирует документ в формат ZPL
+
+    orientation - часть ориентации, выполняемая принтером (см. ZPL_ORIENTATION); поворот на 90/270
+    и прочее, что принтер не умеет, векторно не печатается - такой документ растеризуется. Инверсию
+    ^LRY принтер применяет только к полям, поэтому инвертированный документ тоже растеризуется
+    """
+    def dots(value_mm):
+        return mm_to_px(value_mm, dpi)
+
+    # ^CI28 - данные полей в UTF-8 (кириллица шрифтом 0)
+    commands = [zpl_header(dots(document.width_mm), dots(document.height_mm), darkness, orientation).encode("ascii"),
+                b"^CI28"]
+    for element in document.elements:
+        origin = f"^FO{dots(element.x_mm)},{dots(element.y_mm)}"
+        if isinstance(element, TextElement):
+            height = max(1, dots(element.font_height_mm))
+            max_lines = max(1, int(element.height_mm // element.font_height_mm))
+            field = (f"^A0N,{height},0^FB{dots(element.width_mm)},{max_lines},0,L,0"
+                     f"^FH^FD{_zpl_field_data(element.text)}^FS")
+            commands.append((origin + field).encode("utf-8"))
+            if element.bold:
+                # У шрифта 0 нет жирного начертания: поле печатается второй раз со сдвигом
+                shift = max(1, height // 25)
+                commands.append((f"^FO{dots(element.x_mm) + shift},{dots(element.y_mm)}" + field).encode("utf-8"))
+        elif isinstance(element, LineElement):
+            length, thickness = max(1, dots(element.length_mm)), max(1, dots(element.thickness_mm))
+            width, height = (thickness, length) if element.vertical else (length, thickness)
+            commands.append(f"{origin}^GB{width},{height},{thickness}^FS".encode("ascii"))
+        elif isinstance(element, BoxElement):
+            width, height = max(1, dots(element.width_mm)), max(1, dots(element.height_mm))
+            thickness = min(max(1, dots(element.thickness_mm)), width, height)
+            commands.append(f"{origin}^GB{width},{height},{thickness}^FS".encode("ascii"))
+        elif isinstance(element, ImageElement):
+            commands.append(origin.encode("ascii") + zpl_graphic_field(render_element_bitmap(element, dpi)) + b"^FS")
+        elif isinstance(element, BarcodeElement):
+            code128_widths(element.data)  # та же проверка символов, что и при растеризации
+            module = max(1, dots(element.module_mm))
+            height = max(1, dots(element.height_mm))
+            readable = "Y" if element.human_readable else "N"
+            commands.append((f"{origin}^BY{module}^BCN,{height},{readable},N,N"
+                             f"^FH^FD{_zpl_barcode_data(element.data)}^FS").encode("utf-8"))
+        else:
+            raise ValueError(f"Неизвестный элемент этикетки: {element!r}")
+    # Кодировка - постоянная настройка принтера: возвращаем исходную для следующих заданий
+    commands.append(b"^CI0")
+    commands.append(zpl_footer(copies).encode("ascii"))
+    return b"".join(commands)
+
+
+def render_document(document, dpi):
+    """Растеризует документ в изображение этикетки (Grayscale8, белый фон)"""
+    def dots(value_mm):
+        return mm_to_px(value_mm, dpi)
+
+    image = QImage(dots(document.width_mm), dots(document.height_mm), QImage.Format_Grayscale8)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    try:
+        for element in document.elements:
+            x, y = dots(element.x_mm), dots(element.y_mm)
+            if isinstance(element, TextElement):
+                font = QFont(element.font_family) if element.font_family else QFont()
+                font.setPixelSize(max(1, dots(element.font_height_mm)))
+                font.setBold(element.bold)
+                painter.setFont(font)
+                painter.setPen(Qt.black)
+                painter.drawText(QRect(x, y, dots(element.width_mm), dots(element.height_mm)),
+                                 Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, element.text)
+            elif isinstance(element, LineElement):
+                length, thickness = max(1, dots(element.length_mm)), max(1, dots(element.thickness_mm))
+                width, height = (thickness, length) if element.vertical else (length, thickness)
+                painter.fillRect(x, y, width, height, Qt.black)
+            elif isinstance(element, BoxElement):
+                width, height = max(1, dots(element.width_mm)), max(1, dots(element.height_mm))
+                thickness = min(max(1, dots(element.thickness_mm)), width, height)
+                painter.fillRect(x, y, width, thickness, Qt.black)
+                painter.fillRect(x, y + height - thickness, width, thickness, Qt.black)
+                painter.fillRect(x, y, thickness, height, Qt.black)
+                painter.fillRect(x + width - thickness, y, thickness, height, Qt.black)
+            elif isinstance(element, ImageElement):
+                width, height = dots(element.width_mm), dots(element.height_mm)
+                source = load_grayscale(element.path, (width, height))
+                aspect = Qt.KeepAspectRatio if element.keep_aspect_ratio else Qt.IgnoreAspectRatio
+                painter.drawImage(x, y, source.scaled(width, height, aspect, Qt.SmoothTransformation))
+            elif isinstance(element, BarcodeElement):
+                module = max(1, dots(element.module_mm))
+                height = max(1, dots(element.height_mm))
+                offset = x
+                for index, width in enumerate(code128_widths(element.data)):
+                    # Чётные позиции - штрихи, нечётные - пробелы
+                    if index % 2 == 0:
+                        painter.fillRect(offset, y, width * module, height, Qt.black)
+                    offset += width * module
+                if element.human_readable:
+                    font = QFont()
+                    font.setPixelSize(max(1, module * 9))
+                    painter.setFont(font)
+                    painter.setPen(Qt.black)
+                    painter.drawText(QRect(x, y + height, offset - x, module * 12), Qt.AlignHCenter | Qt.AlignTop,
+                                     element.data)
+            else:
+                raise ValueError(f"Неизвестный элемент этикетки: {element!r}")
+    finally:
+        painter.end()
+    return image
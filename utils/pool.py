@@ -0,0 +1,215 @@
+import queue
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from loguru import logger
+
+from utils.transport import RawTransport, TransportError
+
+
+def split_batch(count, depths):
+    """
+    Делит count этикеток между принтерами с очередями depths так, чтобы выровнять их загрузку
+
+    Возвращает число этикеток для каждого принтера (в порядке depths)
+    """
+    if not depths:
+        return []
+
+    # Ищем уровень, до которого "доливаются" очереди
+    ordered = sorted(depths)
+    remaining, level = count, ordered[0]
+    for index, depth in enumerate(ordered):
+        next_depth = ordered[index + 1] if index + 1 < len(ordered) else None
+        filled = index + 1
+        if next_depth is None or (next_depth - depth) * filled >= remaining:
+            level = depth + remaining / filled
+            break
+        remaining -= (next_depth - depth) * filled
+
+    shares = [max(0, int(level - depth)) for depth in depths]
+    # Остаток от округления отдаём наименее загруженным
+    for index in sorted(range(len(depths)), key=lambda i: depths[i] + shares[i])[:count - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+
+class PoolJob:
+    def __init__(self, token, labels_count, on_sent=None):
+        self.token = token
+        self.remaining = labels_count
+        self.on_sent = on_sent
+        self.started = time.perf_counter()
+        self.failed = False
+        # Принтеры, на которых отправка этого задания уже обрывалась
+        self.failed_members = set()
+
+
+class PoolMember:
+    """Принтер пула со своей очередью и потоком отправки"""
+
+    def __init__(self, name, address):
+        self.name = name
+        self.transport = RawTransport(address)
+        self.queue = queue.Queue()
+        self.pending = 0
+        self.online = True
+        self.checked_at = 0.0
+        self.thread = None
+
+
+class PrinterPool(QObject):
+    """
+    Пул одинаковых принтеров под одним именем (одиночный сетевой принтер - пул из одного принтера)
+
+    Этикетки задания делятся на непрерывные части (порядок внутри части сохраняется) по глубине
+    очередей живых принтеров. Если принтер отваливается, неотправленные этикетки уходят другим.
+    Вся сеть (проверка связи, отправка) - в потоках принтеров, GUI-поток только раскладывает очереди
+    """
+
+    STATUS_TTL_S = 10
+    # Поток принтера завершается, простояв без заданий столько секунд
+    WORKER_IDLE_S = 30
+
+    job_finished = pyqtSignal(object, float)
+    job_failed = pyqtSignal(object, str)
+
+    def __init__(self, name, members, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.members = [PoolMember(member_name, address) for member_name, address in members.items()]
+        self._lock = threading.Lock()
+
+    def live_members(self, exclude=()):
+        """
+        Принтеры, которым можно отдать этикетки, по последнему известному статусу (без обращения к сети)
+
+        Недоступный принтер снова получает работу, когда его статус старше STATUS_TTL_S: связь
+        проверит его поток перед отправкой
+        """
+        now = time.monotonic()
+        return [member for member in self.members
+                if member not in exclude and (member.online or now - member.checked_at > self.STATUS_TTL_S)]
+
+    def submit(self, labels, token=None, on_sent=None, indices=None):
+        """
+        Распределяет этикетки (список готовых команд) между принтерами пула
+
+        on_sent(номера) вызывается из потока отправки для каждой пачки этикеток, принятой принтером;
+        indices - номера этикеток в исходном задании (при допечатке из спула), по умолчанию 0..n-1
+        """
+        job = PoolJob(token, len(labels), on_sent)
+        if indices is None:
+            indices = range(len(labels))
+        self._dispatch(job, list(zip(indices, labels)))
+
+    def _dispatch(self, job, labels, error=None):
+        if job.failed:
+            return
+
+        members = self.live_members(job.failed_members)
+        if not members:
+            # Все принтеры недавно были недоступны: пробуем те, что ещё не отказали в этом задании
+            members = [member for member in self.members if member not in job.failed_members]
+        if not members:
+            job.failed = True
+            if len(self.members) == 1:
+                message = f"Принтер '{self.name}' недоступен"
+            else:
+                message = f"В пуле '{self.name}' нет доступных принтеров"
+            if error is not None:
+                message += f" (последняя ошибка: {error})"
+            self.job_failed.emit(job.token, message)
+            return
+
+        with self._lock:
+            shares = split_batch(len(labels), [member.pending for member in members])
+            offset = 0
+            for member, share in zip(members, shares):
+                if not share:
+                    continue
+                member.pending += share
+                member.queue.put((job, labels[offset:offset + share]))
+                offset += share
+                self._ensure_worker(member)
+                logger.debug(f"Пул {self.name}: {share} эт. на {member.name}")
+
+    def _ensure_worker(self, member):
+        # Вызывается под self._lock
+        if member.thread is None:
+            member.thread = threading.Thread(target=self._worker, args=(member,), daemon=True)
+            member.thread.start()
+
+    def _worker(self, member):
+        try:
+            while True:
+                try:
+                    job, labels = member.queue.get(timeout=self.WORKER_IDLE_S)
+                except queue.Empty:
+                    with self._lock:
+                        if member.queue.empty():
+                            return
+                    continue
+                self._send(member, job, labels)
+        finally:
+            with self._lock:
+                member.thread = None
+                # Поток завершился, а задания пришли после проверки очереди (или поток упал) - новый поток
+                if not member.queue.empty():
+                    self._ensure_worker(member)
+
+    def _ack(self, job, indices):
+        """Подтверждение принятых этикеток; сбой записи подтверждения не повод отправлять их повторно"""
+        try:
+            job.on_sent(indices)
+        except OSError as e:
+            logger.error(f"Пул {self.name}: не удалось подтвердить отправку этикеток {list(indices)}: {e}")
+
+    def _send(self, member, job, labels):
+        if job.failed:
+            with self._lock:
+                member.pending -= len(labels)
+            return
+
+        sent_count, error = 0, None
+        try:
+            if not member.online:
+                # Статус устарел: проверяем связь здесь, а не в GUI-потоке
+                member.online = member.transport.is_online()
+                member.checked_at = time.monotonic()
+                if not member.online:
+                    raise TransportError(f"{member.transport.address}: нет связи")
+
+            on_sent = None
+            if job.on_sent is not None:
+                on_sent = lambda positions, chunk=labels: self._ack(job, [chunk[position][0] for position in positions])
+            sent_count = member.transport.send_labels([payload for _, payload in labels], on_sent)
+        except TransportError as e:
+            sent_count, error = e.sent_count, e
+            member.online = False
+            member.checked_at = time.monotonic()
+            logger.error(f"Пул {self.name}: ошибка отправки на {member.name}: {e}")
+        except Exception as e:
+            # Не сетевая ошибка повторится и на другом принтере: задание завершается с ошибкой
+            logger.exception(f"Пул {self.name}: сбой отправки на {member.name}")
+            with self._lock:
+                member.pending -= len(labels)
+                failed, job.failed = job.failed, True
+            if not failed:
+                self.job_failed.emit(job.token, f"Ошибка отправки на {member.name}: {e}")
+            return
+
+        with self._lock:
+            member.pending -= len(labels)
+            if job.failed:
+                return
+            job.remaining -= sent_count
+            finished = job.remaining == 0
+
+        if error is not None and sent_count < len(labels):
+            # Переносим неотправленные этикетки на другие принтеры пула
+            job.failed_members.add(member)
+            self._dispatch(job, labels[sent_count:], error)
+        elif finished:
+            self.job_finished.emit(job.token, (time.perf_counter() - job.started) * 1000)
@@ -0,0 +1,156 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from loguru import logger
+
+from utils.render import compose_label, load_grayscale, pack_bitmap, render_label, to_monochrome
+
+
+class RenderedLabel:
+    """
+    Готовая этикетка: страница для QPrinter и (для прямой печати) упакованный 1-битный растр
+
+    document - векторный документ (LabelDocument), если этикетка уходит принтеру командами ZPL
+    """
+
+    def __init__(self, page, bitmap=None, document=None):
+        self.page = page
+        self.bitmap = bitmap
+        self.document = document
+
+
+def rendered_size(rendered):
+    """Объём памяти этикетки в байтах: страница и растр"""
+    size = rendered.page.image.sizeInBytes() if rendered.page is not None else 0
+    if rendered.bitmap is not None:
+        size += len(rendered.bitmap.data)
+    return size
+
+
+def render_file(image_path, params, with_bitmap=False, cache=None):
+    """
+    Полный рендеринг файла под параметры этикетки (ImageLoadError если файл не загружается)
+
+    cache (ContentCache) проверяется до рендеринга и пополняется после
+    """
+    rendered = cache.get_label(image_path, params) if cache is not None else None
+    if rendered is not None and rendered.page is not None and (rendered.bitmap is not None or not with_bitmap):
+        return rendered
+
+    if rendered is None or rendered.page is None:
+        image = load_grayscale(image_path, params.target_size_px)
+        rendered = RenderedLabel(render_label(image, params))
+    if with_bitmap:
+        rendered.bitmap = pack_bitmap(to_monochrome(compose_label(rendered.page, params)))
+    if cache is not None:
+        cache.put_label(image_path, params, rendered)
+    return rendered
+
+
+def render_key(image_path, params):
+    """Ключ кэша: путь, время изменения файла и параметры этикетки"""
+    try:
+        mtime = os.stat(image_path).st_mtime_ns
+    except OSError:
+        return None
+    return image_path, mtime, params
+
+
+class _RenderTask(QRunnable):
+    def __init__(self, prerenderer, generation, key, with_bitmap):
+        super().__init__()
+        self.prerenderer = prerenderer
+        self.generation = generation
+        self.key = key
+        self.with_bitmap = with_bitmap
+
+    def run(self):
+        # Настройки уже поменялись - результат никому не нужен (прогрев кэша не отменяется)
+        if self.generation is not None and self.generation != self.prerenderer.generation:
+            return
+        image_path, _, params = self.key
+        try:
+            rendered = render_file(image_path, params, self.with_bitmap, self.prerenderer.cache)
+        except Exception as e:
+            logger.error(f"Ошибка предварительного рендеринга {image_path}: {e}")
+            return
+        self.prerenderer.rendered.emit(self.generation, self.key, rendered)
+
+
+class Prerenderer(QObject):
+    """
+    Фоновый рендеринг выбранных изображений под текущие настройки до нажатия "Печать"
+
+    Результаты складываются в LRU-кэш, из которого их берёт print_images. При смене настроек
+    поколение увеличивается: задачи из очереди снимаются, устаревшие результаты отбрасываются
+    """
+
+    # Предел памяти кэша: страницы (Grayscale8) и упакованные растры этикеток
+    MAX_BYTES = 256 * 1024 * 1024
+
+    rendered = pyqtSignal(object, object, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        # Дисковый кэш (ContentCache): этикетки, отрисованные раньше или на другой станции
+        self.cache = cache
+        self.generation = 0
+        self._cache = OrderedDict()
+        # Размер запоминается при добавлении: print_images дописывает растр в уже лежащую этикетку
+        self._sizes = {}
+        self._cache_bytes = 0
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+        # Прогрев кэша при запуске идёт в одном потоке и не мешает рендерингу выбранного
+        self._warm_pool = QThreadPool(self)
+        self._warm_pool.setMaxThreadCount(1)
+        self.rendered.connect(self._store, Qt.QueuedConnection)
+
+    def request(self, image_paths, params, with_bitmap=False, replace=True):
+        """Ставит изображения в фоновый рендеринг; replace=True отменяет прежние задачи"""
+        if replace:
+            self.generation += 1
+            self._thread_pool.clear()
+
+        for image_path in image_paths:
+            key = render_key(image_path, params)
+            if key is None:
+                continue
+            cached = self._cache.get(key)
+            if cached is not None and (cached.bitmap is not None or not with_bitmap):
+                continue
+            self._thread_pool.start(_RenderTask(self, self.generation, key, with_bitmap))
+
+    def warm(self, image_paths, params, with_bitmap=False):
+        """Рендеринг в кэш про запас (например, под пресеты других принтеров); не отменяется сменой настроек"""
+        for image_path in image_paths:
+            key = render_key(image_path, params)
+            if key is not None and key not in self._cache:
+                self._warm_pool.start(_RenderTask(self, None, key, with_bitmap))
+
+    def get(self, image_path, params):
+        """Готовая этикетка из кэша или None"""
+        key = render_key(image_path, params)
+        rendered = self._cache.get(key) if key is not None else None
+        if rendered is not None:
+            self._cache.move_to_end(key)
+        return rendered
+
+    def put(self, image_path, params, rendered):
+        key = render_key(image_path, params)
+        if key is not None:
+            self._store(self.generation, key, rendered)
+
+    def _store(self, generation, key, rendered):
+        if generation is not None and generation != self.generation:
+            return
+        self._cache.pop(key, None)
+        self._cache_bytes -= self._sizes.pop(key, 0)
+        self._cache[key] = rendered
+        self._sizes[key] = rendered_size(rendered)
+        self._cache_bytes += self._sizes[key]
+        # Последнюю добавленную этикетку не вытесняем, даже если она одна больше предела
+        while self._cache_bytes > self.MAX_BYTES and len(self._cache) > 1:
+            evicted_key, _ = self._cache.popitem(last=False)
+            self._cache_bytes -= self._sizes.pop(evicted_key)
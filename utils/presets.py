@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+from utils.render import LabelParams
+from utils.settings import load_settings, update_settings
+
+PRESETS_KEY = "media_presets"
+
+
+class MediaPreset(namedtuple("MediaPreset", "width_mm height_mm margin_left_mm margin_top_mm dpi keep_aspect_ratio "
+                                            "darkness rotation mirror invert")):
+    """Настройки носителя принтера: размер этикетки, отступы, DPI, плотность и ориентация"""
+
+    @classmethod
+    def from_dict(cls, values):
+        # Поля, добавленные позже, берутся по умолчанию, чтобы старые настройки читались
+        defaults = cls(100.0, 75.0, 1.0, 1.0, 300, False, 30, 0, False, False)._asdict()
+        defaults.update((key, value) for key, value in values.items() if key in cls._fields)
+        return cls(**defaults)
+
+    @property
+    def label_params(self):
+        return LabelParams(self.width_mm, self.height_mm, self.margin_left_mm, self.margin_top_mm, int(self.dpi),
+                           self.keep_aspect_ratio)
+
+
+class PresetStore:
+    """
+    Именованные пресеты носителя для каждого принтера в settings.json
+
+    {"media_presets": {"принтер": {"active": "имя", "presets": {"имя": {...}}}}}
+    """
+
+    def __init__(self):
+        self.data = load_settings().get(PRESETS_KEY, {})
+
+    def names(self, printer_name):
+        return sorted(self.data.get(printer_name, {}).get("presets", {}))
+
+    def get(self, printer_name, preset_name):
+        values = self.data.get(printer_name, {}).get("presets", {}).get(preset_name)
+        return MediaPreset.from_dict(values) if values is not None else None
+
+    def active_name(self, printer_name):
+        return self.data.get(printer_name, {}).get("active")
+
+    def active(self, printer_name):
+        """Активный пресет принтера или None"""
+        name = self.active_name(printer_name)
+        return self.get(printer_name, name) if name else None
+
+    def active_presets(self):
+        """{принтер: активный пресет} для всех принтеров с пресетами"""
+        result = {}
+        for printer_name in self.data:
+            preset = self.active(printer_name)
+            if preset is not None:
+                result[printer_name] = preset
+        return result
+
+    def save(self, printer_name, preset_name, preset):
+        """Сохраняет пресет и делает его активным"""
+        printer = self.data.setdefault(printer_name, {"presets": {}})
+        printer["presets"][preset_name] = preset._asdict()
+        printer["active"] = preset_name
+        self._write()
+
+    def select(self, printer_name, preset_name):
+        printer = self.data.get(printer_name)
+        if printer is not None and preset_name in printer["presets"] and printer.get("active") != preset_name:
+            printer["active"] = preset_name
+            self._write()
+
+    def delete(self, printer_name, preset_name):
+        printer = self.data.get(printer_name)
+        if printer is None or preset_name not in printer["presets"]:
+            return
+        del printer["presets"][preset_name]
+        if printer.get("active") == preset_name:
+            printer["active"] = next(iter(sorted(printer["presets"])), None)
+        self._write()
+
+    def _write(self):
+        update_settings(**{PRESETS_KEY: self.data})
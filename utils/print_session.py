@@ -0,0 +1,114 @@
+import time
+
+from PyQt5.QtCore import QObject, QSizeF, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter
+from loguru import logger
+
+from utils.render import draw_page
+
+
+class PrintSessionManager(QObject):
+    """
+    Держит настроенные QPrinter для каждой комбинации (принтер, размер бумаги, DPI)
+
+    Задания с одинаковыми настройками, пришедшие в пределах окна BATCH_WINDOW_MS,
+    объединяются в один документ спулера, чтобы драйвер не инициализировался на каждую этикетку
+    """
+
+    BATCH_WINDOW_MS = 300
+
+    job_finished = pyqtSignal(str, int)
+    jobs_spooled = pyqtSignal(list)
+    job_failed = pyqtSignal(str, str)
+
+    def __init__(self, printer_cache, parent=None):
+        super().__init__(parent)
+        self._printer_cache = printer_cache
+        self._printers = {}
+        self._pending_key = None
+        self._pending_pages = []
+        self._pending_jobs = []
+
+        self._batch_timer = QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.timeout.connect(self.flush)
+
+    def submit(self, printer_name, params, copies, pages, job=None):
+        """Ставит страницы в очередь; печать начнётся после окна объединения"""
+        batch_key = ((printer_name, params.width_mm, params.height_mm, params.dpi), copies)
+        if self._pending_key is not None and self._pending_key != batch_key:
+            self.flush()
+
+        self._pending_key = batch_key
+        self._pending_pages.extend(pages)
+        if job is not None:
+            self._pending_jobs.append(job)
+        self._batch_timer.start(self.BATCH_WINDOW_MS)
+
+    def session_printer(self, session_key):
+        """Настроенный QPrinter для сессии, None если принтер не найден"""
+        from PyQt5.QtPrintSupport import QPrinter
+
+        printer = self._printers.get(session_key)
+        if printer is None:
+            printer_name, width_mm, height_mm, dpi = session_key
+            printer_info = self._printer_cache.printer_info(printer_name)
+            if printer_info.isNull():
+                return None
+
+            printer = QPrinter(printer_info)
+            printer.setFullPage(True)
+            printer.setPaperSize(QSizeF(width_mm, height_mm), QPrinter.Millimeter)
+            printer.setResolution(dpi)
+            self._printers[session_key] = printer
+            logger.debug(f"Создана сессия печати: {session_key}")
+        return printer
+
+    def flush(self):
+        """Печатает накопленные страницы одним документом"""
+        self._batch_timer.stop()
+        if not self._pending_pages:
+            return
+
+        (session_key, copies), pages, jobs = self._pending_key, self._pending_pages, self._pending_jobs
+        self._pending_key, self._pending_pages, self._pending_jobs = None, [], []
+        printer_name = session_key[0]
+
+        printer = self.session_printer(session_key)
+        if printer is None:
+            self.job_failed.emit(printer_name, f"Принтер '{printer_name}' не найден!")
+            return
+        printer.setCopyCount(copies)
+
+        spool_started = time.perf_counter()
+        painter = QPainter()
+        if not painter.begin(printer):
+            self.job_failed.emit(printer_name, "Не удалось начать печать!")
+            return
+
+        try:
+            for index, page in enumerate(pages):
+                if index:
+                    printer.newPage()
+                draw_page(painter, page)
+        except Exception as e:
+            logger.error(f"Ошибка при печати: {e}")
+            self.job_failed.emit(printer_name, f"Произошла ошибка при печати: {str(e)}")
+            return
+        finally:
+            painter.end()
+
+        logger.debug(f"Отправлено страниц: {len(pages)} на {printer_name}")
+        spool_ms = (time.perf_counter() - spool_started) * 1000
+        for job in jobs:
+            # Объединённые задания уходят одним документом, поэтому время спулинга у них общее
+            job.add_stage("spool", spool_ms)
+            job.finish(batched_jobs=len(jobs))
+        if jobs:
+            self.jobs_spooled.emit(jobs)
+        self.job_finished.emit(printer_name, len(pages))
+
+    def invalidate(self):
+        """Сбрасывает настроенные принтеры (при обновлении списка принтеров)"""
+        self.flush()
+        self._printers.clear()
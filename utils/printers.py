@@ -0,0 +1,63 @@
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from loguru import logger
+
+from utils.settings import load_settings, update_settings
+
+
+class PrinterDiscoveryThread(QThread):
+    """Фоновый поиск принтеров (availablePrinters может висеть секундами на офлайн сетевых принтерах)"""
+
+    printers_found = pyqtSignal(list, str)
+    discovery_failed = pyqtSignal(str)
+
+    def run(self):
+        # QtPrintSupport подгружает плагины печати, поэтому импортируем его только при поиске
+        from PyQt5.QtPrintSupport import QPrinterInfo
+
+        started = time.perf_counter()
+        try:
+            names = [printer.printerName() for printer in QPrinterInfo.availablePrinters()]
+            default_printer = QPrinterInfo.defaultPrinter()
+            default_name = "" if default_printer.isNull() else default_printer.printerName()
+        except Exception as e:
+            logger.error(f"Ошибка при поиске принтеров: {e}")
+            self.discovery_failed.emit(str(e))
+            return
+
+        logger.debug(f"Найдено принтеров: {len(names)} за {(time.perf_counter() - started) * 1000:.0f} мс")
+        self.printers_found.emit(names, default_name)
+
+
+class PrinterCache:
+    """Кэш списка принтеров и разрешённых по имени QPrinterInfo"""
+
+    def __init__(self):
+        self._infos = {}
+
+    @staticmethod
+    def load_last_known():
+        """Последний известный список принтеров для мгновенного показа при запуске"""
+        settings = load_settings()
+        return settings.get("printers", []), settings.get("default_printer", "")
+
+    @staticmethod
+    def save_last_known(names, default_name):
+        update_settings(printers=names, default_printer=default_name)
+
+    def printer_info(self, name):
+        """QPrinterInfo по имени принтера (ненайденные не кэшируются)"""
+        from PyQt5.QtPrintSupport import QPrinterInfo
+
+        info = self._infos.get(name)
+        if info is None:
+            info = QPrinterInfo.printerInfo(name)
+            if info.isNull():
+                return info
+            self._infos[name] = info
+        return info
+
+    def invalidate(self):
+        """Сбрасывает кэш (при обновлении списка принтеров)"""
+        self._infos.clear()
@@ -0,0 +1,66 @@
+"""
+Профилирование по запросу: ZEBRA_PROFILE=1 или ключ --profile при запуске
+
+Методы, отмеченные @profiled, выполняются под cProfile, результат каждого вызова пишется в
+~/.image_printer/profiles/<метод>-<время>.prof (смотреть: python -m pstats или snakeviz).
+Без ключа декоратор возвращает функцию как есть и ничего не стоит.
+"""
+import cProfile
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+
+from loguru import logger
+
+from utils.utils import get_data_path
+
+PROFILE_ENV = "ZEBRA_PROFILE"
+PROFILE_FLAG = "--profile"
+PROFILES_DIR = "profiles"
+
+PROFILING_ENABLED = os.environ.get(PROFILE_ENV, "") not in ("", "0") or PROFILE_FLAG in sys.argv
+
+_active = threading.local()
+
+
+def profiled(func):
+    """Декоратор: профилирует каждый вызов, если профилирование включено при запуске"""
+    if not PROFILING_ENABLED:
+        return func
+
+    # PyQt передаёт слоту все аргументы сигнала, если слот их принимает; обёртка с *args
+    # принимает любые, поэтому лишние отбрасываем сами, как это сделал бы PyQt
+    parameters = inspect.signature(func).parameters.values()
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        max_args = None
+    else:
+        max_args = sum(parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+                       for parameter in parameters)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if max_args is not None:
+            args = args[:max_args]
+        # Вложенный вызов уже попадает в профиль внешнего, второй профайлер Python не позволяет
+        if getattr(_active, "profiling", False):
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        _active.profiling = True
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            _active.profiling = False
+            stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+            path = os.path.join(get_data_path(PROFILES_DIR), f"{func.__name__}-{stamp}.prof")
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                profile.dump_stats(path)
+                logger.info(f"Профиль {func.__qualname__} сохранён: {path}")
+            except OSError as e:
+                logger.error(f"Не удалось сохранить профиль {func.__qualname__}: {e}")
+
+    return wrapper
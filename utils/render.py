@@ -0,0 +1,193 @@
+from collections import namedtuple
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter, QTransform, qGray
+
+from utils.image_loader import load_image
+from utils.utils import optional_numpy
+
+MM_PER_INCH = 25.4
+
+
+def mm_to_px(value_mm, dpi):
+    """Переводит миллиметры в пиксели при заданной плотности"""
+    return int(value_mm * dpi / MM_PER_INCH)
+
+
+class LabelParams(namedtuple("LabelParams", "width_mm height_mm margin_left_mm margin_top_mm dpi keep_aspect_ratio")):
+    """Параметры этикетки из левой панели"""
+
+    @property
+    def target_size_px(self):
+        return mm_to_px(self.width_mm, self.dpi), mm_to_px(self.height_mm, self.dpi)
+
+    @property
+    def margins_px(self):
+        return mm_to_px(self.margin_left_mm, self.dpi), mm_to_px(self.margin_top_mm, self.dpi)
+
+
+class LabelPage(namedtuple("LabelPage", "image x y fill_rect")):
+    """Отрисованная этикетка: изображение, его позиция на странице и белая подложка (или None)"""
+
+
+class Bitmap(namedtuple("Bitmap", "data width height bytes_per_row")):
+    """Монохромная этикетка, упакованная построчно по 8 точек в байт (1 - черная точка)"""
+
+
+def to_grayscale(image):
+    """
+    Переводит изображение в Format_Grayscale8 (1 байт на точку вместо 4)
+
+    Прозрачные области накладываются на белый фон, как при печати на бумагу
+    """
+    if image.format() == QImage.Format_Grayscale8:
+        return image
+    if not image.hasAlphaChannel():
+        return image.convertToFormat(QImage.Format_Grayscale8)
+
+    gray = QImage(image.size(), QImage.Format_Grayscale8)
+    gray.fill(Qt.white)
+    painter = QPainter(gray)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return gray
+
+
+def load_grayscale(image_path, target_size=None):
+    """Загружает изображение (уменьшая при декодировании до target_size) в оттенках серого"""
+    return to_grayscale(load_image(image_path, target_size))
+
+
+def render_label(image, params):
+    """Масштабирует изображение под этикетку и вычисляет его положение на странице"""
+    # Сглаженное масштабирование в Qt возвращает RGB32, поэтому сразу возвращаемся к 1 байту на точку
+    image = to_grayscale(image)
+    target_width_px, target_height_px = params.target_size_px
+    margin_left_px, margin_top_px = params.margins_px
+
+    if not params.keep_aspect_ratio:
+        # РАСТЯГИВАЕМ ИЗОБРАЖЕНИЕ БЕЗ СОХРАНЕНИЯ ПРОПОРЦИЙ
+        scaled_image = image.scaled(
+            target_width_px,
+            target_height_px,
+            Qt.IgnoreAspectRatio,  # Игнорируем пропорции
+            Qt.SmoothTransformation
+        ).convertToFormat(QImage.Format_Grayscale8)
+        return LabelPage(scaled_image, margin_left_px, margin_top_px, None)
+
+    # СОХРАНЕНИЕ ПРОПОРЦИЙ С ЦЕНТРИРОВАНИЕМ
+    # Вычисляем соотношение сторон исходного изображения
+    source_aspect = image.width() / image.height()
+    target_aspect = target_width_px / target_height_px
+
+    if source_aspect > target_aspect:
+        # Изображение шире, чем целевая область - ограничиваем по ширине
+        scaled_width = target_width_px
+        scaled_height = int(target_width_px / source_aspect)
+    else:
+        # Изображение выше, чем целевая область - ограничиваем по высоте
+        scaled_height = target_height_px
+        scaled_width = int(target_height_px * source_aspect)
+
+    # Масштабируем изображение с сохранением пропорций
+    scaled_image = image.scaled(
+        scaled_width,
+        scaled_height,
+        Qt.KeepAspectRatio,
+        Qt.SmoothTransformation
+    ).convertToFormat(QImage.Format_Grayscale8)
+
+    # Вычисляем координаты для центрирования
+    x_offset = margin_left_px + (target_width_px - scaled_width) // 2
+    y_offset = margin_top_px + (target_height_px - scaled_height) // 2
+    fill_rect = QRect(margin_left_px, margin_top_px, target_width_px, target_height_px)
+    return LabelPage(scaled_image, x_offset, y_offset, fill_rect)
+
+
+def draw_page(painter, page):
+    """Рисует этикетку на текущей странице"""
+    if page.fill_rect is not None:
+        # Рисуем белый фон
+        painter.fillRect(page.fill_rect, Qt.white)
+    painter.drawImage(page.x, page.y, page.image)
+
+
+def compose_label(page, params):
+    """Собирает этикетку целиком (размер бумаги) на белом фоне для отправки на принтер напрямую"""
+    width_px, height_px = params.target_size_px
+    label = QImage(width_px, height_px, QImage.Format_Grayscale8)
+    label.fill(Qt.white)
+
+    painter = QPainter(label)
+    draw_page(painter, page)
+    painter.end()
+    return label
+
+
+def orient_page(page, params, orientation):
+    """
+    Применяет ориентацию к странице для печати через драйвер
+
+    Возвращает (страница, параметры) - при повороте на 90/270 ширина и высота бумаги меняются местами
+    """
+    if orientation.is_identity:
+        return page, params
+
+    label = compose_label(page, params)
+    if orientation.rotation:
+        label = label.transformed(QTransform().rotate(orientation.rotation)).convertToFormat(QImage.Format_Grayscale8)
+    if orientation.mirror:
+        label = label.mirrored(True, False)
+    if orientation.invert:
+        label.invertPixels()
+    if orientation.rotation in (90, 270):
+        params = params._replace(width_mm=params.height_mm, height_mm=params.width_mm)
+    return LabelPage(label, 0, 0, None), params
+
+
+def to_monochrome(image):
+    """Переводит изображение в 1 бит на точку с дизерингом"""
+    return image.convertToFormat(QImage.Format_Mono, Qt.MonoOnly | Qt.DiffuseDither)
+
+
+def image_buffer(image):
+    """Буфер точек QImage без копирования (действителен, пока жив image)"""
+    bits = image.constBits()
+    bits.setsize(image.byteCount())
+    return memoryview(bits)
+
+
+def image_array(image):
+    """Двумерный numpy-массив поверх строк QImage без копирования (ширина - bytesPerLine)"""
+    np = optional_numpy()
+    return np.frombuffer(image_buffer(image), np.uint8).reshape(image.height(), image.bytesPerLine())
+
+
+def pack_bitmap(mono_image):
+    """Упаковывает Format_Mono изображение в построчный массив бит без выравнивания строк"""
+    width, height = mono_image.width(), mono_image.height()
+    bytes_per_row = (width + 7) // 8
+    stride = mono_image.bytesPerLine()
+
+    # В Qt индекс цвета 1 обычно черный, но таблица цветов может быть и обратной
+    invert = qGray(mono_image.color(1)) > qGray(mono_image.color(0))
+    # Лишние биты в конце строки обнуляем, чтобы не печатать мусор
+    tail_mask = (0xFF << (bytes_per_row * 8 - width)) & 0xFF
+
+    # Без numpy (он необязателен) упаковка бит идёт построчно
+    if optional_numpy() is not None:
+        rows = image_array(mono_image)[:, :bytes_per_row]
+        rows = ~rows if invert else rows.copy()
+        rows[:, -1] &= tail_mask
+        return Bitmap(rows.tobytes(), width, height, bytes_per_row)
+
+    raw = image_buffer(mono_image)
+    rows = bytearray()
+    for row in range(height):
+        line = bytearray(raw[row * stride:row * stride + bytes_per_row])
+        if invert:
+            line = bytearray(byte ^ 0xFF for byte in line)
+        line[-1] &= tail_mask
+        rows += line
+
+    return Bitmap(bytes(rows), width, height, bytes_per_row)
@@ -0,0 +1,41 @@
+import json
+import os
+
+from loguru import logger
+
+from utils.utils import get_data_path
+
+SETTINGS_FILE = "settings.json"
+
+
+def load_settings():
+    """Читает настройки приложения, при ошибке возвращает пустой словарь"""
+    settings_path = get_data_path(SETTINGS_FILE)
+    if not os.path.exists(settings_path):
+        return {}
+
+    try:
+        with open(settings_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Не удалось прочитать настройки {settings_path}: {e}")
+        return {}
+
+
+def save_settings(settings):
+    """Атомарно сохраняет настройки (через временный файл)"""
+    settings_path = get_data_path(SETTINGS_FILE)
+    temp_path = f"{settings_path}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, settings_path)
+    except OSError as e:
+        logger.error(f"Не удалось сохранить настройки {settings_path}: {e}")
+
+
+def update_settings(**values):
+    """Обновляет отдельные ключи настроек"""
+    settings = load_settings()
+    settings.update(values)
+    save_settings(settings)
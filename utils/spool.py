@@ -0,0 +1,198 @@
+import json
+import os
+import struct
+import threading
+
+from loguru import logger
+
+from utils.utils import get_data_path
+
+SPOOL_DIR = "spool"
+SEGMENT_SUFFIX = ".spool"
+ACK_SUFFIX = ".ack"
+
+# Заголовок сегмента: сигнатура, версия, длина JSON с описанием задания
+SEGMENT_HEADER = struct.Struct("<4sHI")
+SEGMENT_MAGIC = b"ZSPL"
+SEGMENT_VERSION = 1
+# Запись подтверждения: номер отправленной этикетки в задании
+ACK_RECORD = struct.Struct("<I")
+
+
+def _fsync_dir(directory):
+    """Сбрасывает на диск запись каталога (переименование файла); в Windows каталог открыть нельзя"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SpoolEntry:
+    """
+    Задание в спуле: сегмент с командами всех этикеток и журнал подтверждений
+
+    Подтверждения дописываются пачками принятых принтером этикеток, поэтому после сбоя известно,
+    какие этикетки уже ушли на принтер. Потокобезопасно: этикетки пула подтверждаются из потоков отправки
+    """
+
+    def __init__(self, path, printer, meta, sizes, acked=()):
+        self.path = path
+        self.printer = printer
+        self.meta = meta
+        self.sizes = sizes
+        self.acked = set(acked)
+        self._payloads = None
+        self._ack_file = None
+        self._lock = threading.Lock()
+
+    @property
+    def ack_path(self):
+        return self.path[:-len(SEGMENT_SUFFIX)] + ACK_SUFFIX
+
+    @property
+    def labels_count(self):
+        return len(self.sizes)
+
+    @property
+    def is_complete(self):
+        return len(self.acked) >= len(self.sizes)
+
+    def payloads(self):
+        """Команды этикеток (читаются из сегмента один раз)"""
+        if self._payloads is None:
+            with open(self.path, "rb") as f:
+                _, _, meta_size = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+                f.seek(meta_size, os.SEEK_CUR)
+                data = f.read()
+            self._payloads, offset = [], 0
+            for size in self.sizes:
+                self._payloads.append(data[offset:offset + size])
+                offset += size
+        return self._payloads
+
+    def remaining(self):
+        """Неподтверждённые этикетки: список (номер, команды) в исходном порядке"""
+        return [(index, payload) for index, payload in enumerate(self.payloads()) if index not in self.acked]
+
+    def ack(self, indices):
+        """Отмечает этикетки отправленными; записи сбрасываются на диск одним fsync до возврата"""
+        with self._lock:
+            new = [index for index in indices if index not in self.acked]
+            if not new:
+                return
+            if self._ack_file is None:
+                self._ack_file = open(self.ack_path, "ab", buffering=0)
+            self._ack_file.write(b"".join(ACK_RECORD.pack(index) for index in new))
+            os.fsync(self._ack_file.fileno())
+            self.acked.update(new)
+
+    def close(self):
+        with self._lock:
+            if self._ack_file is not None:
+                self._ack_file.close()
+                self._ack_file = None
+
+
+class PrintSpool:
+    """
+    Спул прямой печати на диске (write-ahead)
+
+    Перед отправкой готовые команды задания пишутся одним последовательным блоком во временный
+    файл, сбрасываются на диск и атомарно переименовываются в сегмент. Отправленные этикетки
+    подтверждаются в отдельном журнале, сегмент удаляется после подтверждения всех этикеток.
+    После падения или перезагрузки незавершённые задания допечатываются с первой
+    неподтверждённой этикетки. Пачка подтверждается, когда принтер принял её и закрыл соединение,
+    поэтому при обрыве в момент отправки этикетки пачки могут напечататься повторно, но не пропасть
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or get_data_path(SPOOL_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._next_seq = max(self._segment_numbers(), default=0) + 1
+
+    def _segment_numbers(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext == SEGMENT_SUFFIX and stem.isdigit():
+                numbers.append(int(stem))
+        return numbers
+
+    def commit(self, printer, payloads, meta=None):
+        """Записывает задание в спул до отправки, возвращает SpoolEntry"""
+        sizes = [len(payload) for payload in payloads]
+        meta = dict(meta or {}, printer=printer, sizes=sizes)
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+        path = os.path.join(self.directory, f"{seq:010d}{SEGMENT_SUFFIX}")
+        tmp_path = path + ".tmp"
+
+        # Заголовок и все этикетки уходят одной записью и одним fsync на задание
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join([SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, len(meta_bytes)), meta_bytes,
+                              *payloads]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(self.directory)
+
+        entry = SpoolEntry(path, printer, meta, sizes)
+        entry._payloads = list(payloads)
+        logger.debug(f"Спул: задание {os.path.basename(path)}, {len(sizes)} эт., {sum(sizes)} байт")
+        return entry
+
+    def complete(self, entry):
+        """Удаляет задание из спула (все этикетки отправлены или печать отменена)"""
+        entry.close()
+        for path in (entry.ack_path, entry.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def pending(self):
+        """Незавершённые задания с прошлого запуска (старые первыми)"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                # Запись прервалась до переименования - задание не отправлялось
+                os.remove(os.path.join(self.directory, name))
+        for seq in sorted(self._segment_numbers()):
+            path = os.path.join(self.directory, f"{seq:010d}{SEGMENT_SUFFIX}")
+            try:
+                entry = self._read_entry(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Спул: повреждён сегмент {path}: {e}")
+                continue
+            if entry.is_complete:
+                self.complete(entry)
+            else:
+                entries.append(entry)
+        return entries
+
+    def _read_entry(self, path):
+        with open(path, "rb") as f:
+            magic, version, meta_size = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+            if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+                raise ValueError("неизвестный формат")
+            meta = json.loads(f.read(meta_size).decode("utf-8"))
+
+        acked = []
+        ack_path = path[:-len(SEGMENT_SUFFIX)] + ACK_SUFFIX
+        if os.path.exists(ack_path):
+            with open(ack_path, "rb") as f:
+                data = f.read()
+            # Недописанная последняя запись отбрасывается
+            usable = len(data) - len(data) % ACK_RECORD.size
+            acked = [index for (index,) in ACK_RECORD.iter_unpack(data[:usable])]
+        return SpoolEntry(path, meta["printer"], meta, meta["sizes"], acked)
@@ -0,0 +1,75 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from loguru import logger
+
+
+class StartupProfiler:
+    """Замер длительности этапов запуска приложения"""
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+        self.first_paint_ms = None
+
+    @contextmanager
+    def phase(self, name):
+        """Замеряет этап запуска"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, started)
+
+    def add_phase(self, name, started, finished=None):
+        finished = time.perf_counter() if finished is None else finished
+        self.phases.append((name, (finished - started) * 1000))
+
+    def mark_first_paint(self):
+        """Фиксирует момент первой отрисовки окна"""
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - self.started) * 1000
+
+    def report(self):
+        """Пишет в лог отчёт по этапам запуска и возвращает его текстом"""
+        phases = ", ".join(f"{name} {duration:.0f}" for name, duration in self.phases)
+        total = (time.perf_counter() - self.started) * 1000
+        report = f"Время запуска, мс: {phases}; окно показано через {self.first_paint_ms or 0:.0f}; итого {total:.0f}"
+        logger.info(report)
+        return report
+
+
+class IdleTaskQueue(QObject):
+    """Выполняет отложенные задачи по одной на итерацию цикла событий, не блокируя показ окна"""
+
+    finished = pyqtSignal()
+
+    def __init__(self, profiler, parent=None):
+        super().__init__(parent)
+        self._profiler = profiler
+        self._tasks = deque()
+        self._running = False
+
+    def add(self, name, func):
+        self._tasks.append((name, func))
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            QTimer.singleShot(0, self._run_next)
+
+    def _run_next(self):
+        if not self._tasks:
+            self._running = False
+            self.finished.emit()
+            return
+
+        name, func = self._tasks.popleft()
+        try:
+            with self._profiler.phase(name):
+                func()
+        except Exception as e:
+            logger.error(f"Ошибка отложенной задачи '{name}': {e}")
+        QTimer.singleShot(0, self._run_next)
@@ -0,0 +1,227 @@
+"""
+Пакет шаблонов: один файл с заранее отрисованными 1-битными этикетками и миниатюрами
+
+Формат: заголовок (сигнатура, версия, длина индекса), JSON-индекс и выровненные блоки данных.
+Файл открывается через mmap, растры отдаются срезами memoryview без копирования и без декодирования.
+
+Сборка:
+    python -m utils.template_pack build --size 100x75@203 --size 100x75@300
+Печать из пакета напрямую на принтер:
+    python -m utils.template_pack print "Смайл.jpeg" 100x75@300 192.168.1.50:9100 --copies 2
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from loguru import logger
+
+from utils.render import Bitmap, LabelParams, compose_label, load_grayscale, pack_bitmap, render_label, to_monochrome
+from utils.utils import IMAGE_EXTENSIONS, THUMBNAIL_SIZE, get_resource_path
+
+PACK_MAGIC = b"ZTPK"
+PACK_VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+BLOCK_ALIGN = 16
+DEFAULT_PACK_PATH = get_resource_path("templates.pack")
+
+
+def pack_key(params):
+    """Ключ растра в пакете по параметрам этикетки"""
+    aspect = "k" if params.keep_aspect_ratio else "s"
+    return (f"{params.width_mm:g}x{params.height_mm:g}+{params.margin_left_mm:g},{params.margin_top_mm:g}"
+            f"@{params.dpi}{aspect}")
+
+
+def parse_size(value):
+    """Разбирает размер вида '100x75@300' (мм и DPI)"""
+    try:
+        size, dpi = value.split("@")
+        width_mm, height_mm = map(float, size.lower().split("x"))
+        return width_mm, height_mm, int(dpi)
+    except ValueError:
+        raise ValueError(f"Неверный формат размера: {value}. Используйте формат 'ширинаxвысота@dpi'")
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def build_pack(templates_dir, pack_path, label_params):
+    """Собирает пакет из папки шаблонов для каждого набора параметров этикетки"""
+    from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, Qt
+
+    from utils.image_loader import load_image
+
+    names = sorted(name for name in os.listdir(templates_dir) if name.lower().endswith(IMAGE_EXTENSIONS))
+    blocks, index, offset = [], {"templates": {}}, 0
+
+    def add_block(data):
+        nonlocal offset
+        padding = -offset % BLOCK_ALIGN
+        blocks.append(b"\0" * padding + data)
+        offset += padding
+        block = {"offset": offset, "length": len(data)}
+        offset += len(data)
+        return block
+
+    for name in names:
+        path = os.path.join(templates_dir, name)
+        entry = {"signature": file_signature(path), "bitmaps": {}}
+
+        thumbnail = load_image(path, (THUMBNAIL_SIZE, THUMBNAIL_SIZE)).scaled(
+            THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        thumbnail.save(buffer, "PNG")
+        entry["thumbnail"] = add_block(bytes(data))
+
+        for params in label_params:
+            page = render_label(load_grayscale(path, params.target_size_px), params)
+            bitmap = pack_bitmap(to_monochrome(compose_label(page, params)))
+            block = add_block(bitmap.data)
+            block.update(width=bitmap.width, height=bitmap.height, bytes_per_row=bitmap.bytes_per_row)
+            entry["bitmaps"][pack_key(params)] = block
+
+        index["templates"][name] = entry
+        logger.info(f"Шаблон {name} добавлен в пакет")
+
+    index_data = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    data_start = HEADER.size + len(index_data)
+    data_start += -data_start % BLOCK_ALIGN
+
+    temp_path = f"{pack_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(index_data)))
+        f.write(index_data)
+        f.write(b"\0" * (data_start - HEADER.size - len(index_data)))
+        for block in blocks:
+            f.write(block)
+    # На Windows подменить файл, открытый приложением через mmap, не получится - закройте приложение
+    os.replace(temp_path, pack_path)
+    logger.info(f"Пакет шаблонов собран: {pack_path} ({len(names)} шаблонов, {len(label_params)} размеров)")
+
+
+class TemplatePack:
+    """Пакет шаблонов, открытый через mmap"""
+
+    def __init__(self, pack_path=DEFAULT_PACK_PATH, templates_dir=None):
+        self.path = pack_path
+        self.templates_dir = templates_dir or os.path.join(os.path.dirname(pack_path), "templates")
+        with open(pack_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, _, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"Неверный формат пакета шаблонов: {pack_path}")
+        self.index = json.loads(bytes(self._view[HEADER.size:HEADER.size + index_length]))["templates"]
+        data_start = HEADER.size + index_length
+        self._data_start = data_start + (-data_start % BLOCK_ALIGN)
+
+    @classmethod
+    def open_default(cls):
+        """Пакет рядом с папкой шаблонов или None, если он не собран"""
+        if not os.path.exists(DEFAULT_PACK_PATH):
+            return None
+        try:
+            return cls(DEFAULT_PACK_PATH)
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось открыть пакет шаблонов: {e}")
+            return None
+
+    def _entry(self, template_path):
+        """Запись пакета, если шаблон в папке не менялся после сборки"""
+        name = os.path.basename(template_path)
+        entry = self.index.get(name)
+        if entry is None or os.path.dirname(os.path.abspath(template_path)) != os.path.abspath(self.templates_dir):
+            return None
+        try:
+            if file_signature(template_path) != entry["signature"]:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def _block(self, block):
+        start = self._data_start + block["offset"]
+        return self._view[start:start + block["length"]]
+
+    def thumbnail(self, template_path):
+        """Миниатюра шаблона (QImage) или None"""
+        from PyQt5.QtGui import QImage
+
+        entry = self._entry(template_path)
+        if entry is None:
+            return None
+        image = QImage.fromData(bytes(self._block(entry["thumbnail"])), "PNG")
+        return None if image.isNull() else image
+
+    def bitmap(self, template_path, params):
+        """Готовый 1-битный растр этикетки (срез mmap без копирования) или None"""
+        entry = self._entry(template_path)
+        block = entry["bitmaps"].get(pack_key(params)) if entry is not None else None
+        if block is None:
+            return None
+        return Bitmap(self._block(block), block["width"], block["height"], block["bytes_per_row"])
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Растры, выданные срезами, ещё используются (печать, кэш предрендера): mmap закроется
+            # сборщиком мусора вместе с последним срезом
+            logger.debug(f"Пакет шаблонов {self.path} ещё используется, файл закроется позже")
+        self._mmap = self._view = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакет заранее отрисованных шаблонов")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Собрать пакет из папки шаблонов")
+    build_parser.add_argument("--templates", default=get_resource_path("templates"))
+    build_parser.add_argument("--output", default=DEFAULT_PACK_PATH)
+    build_parser.add_argument("--size", action="append", default=[], help="Размер этикетки: 100x75@300")
+    build_parser.add_argument("--margin", type=float, nargs=2, default=[1, 1], metavar=("LEFT", "TOP"))
+    build_parser.add_argument("--keep-aspect", action="store_true", help="Сохранять пропорции")
+
+    print_parser = commands.add_parser("print", help="Отправить шаблон из пакета на сетевой принтер")
+    print_parser.add_argument("template")
+    print_parser.add_argument("size")
+    print_parser.add_argument("address", help="Адрес принтера хост:порт")
+    print_parser.add_argument("--pack", default=DEFAULT_PACK_PATH)
+    print_parser.add_argument("--margin", type=float, nargs=2, default=[1, 1], metavar=("LEFT", "TOP"))
+    print_parser.add_argument("--keep-aspect", action="store_true")
+    print_parser.add_argument("--copies", type=int, default=1)
+    args = parser.parse_args()
+
+    def to_params(size):
+        width_mm, height_mm, dpi = parse_size(size)
+        return LabelParams(width_mm, height_mm, args.margin[0], args.margin[1], dpi, args.keep_aspect)
+
+    if args.command == "build":
+        # Сборка работает только с QImage и QPainter по изображениям: экземпляр QGuiApplication не нужен
+        build_pack(args.templates, args.output, [to_params(size) for size in args.size or ["100x75@300"]])
+        return 0
+
+    from utils.encoders import encode_zpl
+    from utils.transport import RawTransport
+
+    pack = TemplatePack(args.pack)
+    bitmap = pack.bitmap(os.path.join(pack.templates_dir, args.template), to_params(args.size))
+    if bitmap is None:
+        logger.error(f"В пакете нет шаблона {args.template} размера {args.size} (или шаблон изменился)")
+        return 1
+    RawTransport(args.address).send(encode_zpl(bitmap, args.copies))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import socket
+
+from loguru import logger
+
+RAW_PORT = 9100
+# Этикеток в одном соединении: после каждой пачки отправка подтверждается в спуле
+ACK_BATCH = 50
+# Сколько ждать, пока принтер закроет соединение после получения всех данных: занятый печатью
+# принтер может читать буфер дольше обычного таймаута
+CLOSE_TIMEOUT = 30.0
+
+
+def parse_printer_address(address):
+    """Разбирает адрес принтера вида 'host' или 'host:port'"""
+    host, _, port = address.strip().rpartition(":")
+    if not host:
+        return port, RAW_PORT
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ValueError(f"Неверный адрес принтера: {address}. Используйте формат 'хост:порт'")
+
+
+class TransportError(OSError):
+    """Ошибка отправки; sent_count - сколько этикеток успело уйти до обрыва"""
+
+    def __init__(self, message, sent_count=0):
+        super().__init__(message)
+        self.sent_count = sent_count
+
+
+class RawTransport:
+    """Отправка готовых команд принтеру по TCP (RAW, порт 9100)"""
+
+    def __init__(self, address, timeout=5.0, close_timeout=CLOSE_TIMEOUT):
+        self.address = address
+        self.host, self.port = parse_printer_address(address)
+        self.timeout = timeout
+        self.close_timeout = close_timeout
+
+    def send(self, payload):
+        """Отправляет данные одним соединением, возвращает число отправленных байт"""
+        self._send_batch([payload])
+        logger.debug(f"Отправлено {len(payload)} байт на {self.host}:{self.port}")
+        return len(payload)
+
+    def _send_batch(self, payloads):
+        """
+        Отправляет команды одним соединением и дожидается, пока принтер их примет
+
+        sendall лишь кладёт данные в буфер ядра: передача закрывается (FIN), и соединение считается
+        принятым, когда принтер закроет его со своей стороны. Если принтер так и не закрыл соединение
+        за close_timeout, пачка всё равно считается принятой: данные уже ушли целиком, и повторная
+        отправка напечатала бы этикетки дважды
+        """
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            for payload in payloads:
+                sock.sendall(payload)
+            sock.shutdown(socket.SHUT_WR)
+            sock.settimeout(self.close_timeout)
+            try:
+                while sock.recv(4096):
+                    pass
+            except socket.timeout:
+                logger.warning(f"{self.host}:{self.port} не закрыл соединение за {self.close_timeout} с "
+                               f"после получения данных, пачка считается принятой")
+
+    def send_labels(self, payloads, on_sent=None, batch_size=ACK_BATCH):
+        """
+        Отправляет этикетки пачками по batch_size, при обрыве сообщает сколько принято
+
+        on_sent(range номеров) вызывается после того, как принтер принял пачку (подтверждение в спуле);
+        исключения on_sent не считаются ошибками отправки и уходят вызывающему как есть
+        """
+        sent_count = 0
+        for start in range(0, len(payloads), batch_size):
+            batch = payloads[start:start + batch_size]
+            try:
+                self._send_batch(batch)
+            except OSError as e:
+                raise TransportError(f"{self.host}:{self.port}: {e}", sent_count) from e
+            sent_count += len(batch)
+            if on_sent is not None:
+                on_sent(range(start, sent_count))
+        return sent_count
+
+    def is_online(self, timeout=0.5):
+        """Быстрая проверка, принимает ли принтер соединения"""
+        try:
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return True
+        except OSError:
+            return False
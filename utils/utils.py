@@ -1,6 +1,16 @@
+import functools
+import hashlib
 import os
 import sys
 
+from loguru import logger
+
+
+# Файлы, которые принимаются как шаблоны и изображения для печати
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+# Сторона миниатюры шаблона/изображения в пикселях (окно, пакет шаблонов, кэш миниатюр)
+THUMBNAIL_SIZE = 120
+
 
 def get_resource_path(relative_path):
     """ Получает абсолютный путь к ресурсу, работает для dev и для PyInstaller """
@@ -12,3 +22,58 @@ def get_resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+
+def get_data_path(relative_path=""):
+    """ Получает путь в папке данных пользователя (настройки, кэши), переживает перезапуск onefile-сборки """
+    base_path = os.path.join(os.path.expanduser("~"), ".image_printer")
+    os.makedirs(base_path, exist_ok=True)
+
+    return os.path.join(base_path, relative_path)
+
+
+@functools.lru_cache(maxsize=None)
+def optional_numpy():
+    """
+    Модуль numpy или None, если он не установлен
+
+    Импортируется при первой упаковке растра, а не при запуске: загрузка numpy заметно откладывает
+    первое появление окна, а нужен он только для печати
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ SHA-1 содержимого файла (читается кусками, чтобы не грузить большие файлы целиком) """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Обработчик loguru по умолчанию (консоль); None - уже заменён фильтрующим
+_console_handler_id = 0
+# Ключи extra записей, которые пишутся только в свой файл (журнал заданий, зависания)
+_file_only_keys = set()
+
+
+def log_to_file_only(key):
+    """ Убирает из консольного вывода loguru записи с extra[key] - у них есть свой файл """
+    global _console_handler_id
+    _file_only_keys.add(key)
+    if _console_handler_id is None:
+        return
+    try:
+        logger.remove(_console_handler_id)
+    except ValueError:
+        # Обработчик по умолчанию уже снят (консоль настроена иначе) - не трогаем её
+        _console_handler_id = None
+        return
+    # В оконной сборке консоли нет
+    _console_handler_id = None
+    if sys.stderr is not None:
+        logger.add(sys.stderr, filter=lambda record: not any(record["extra"].get(k) for k in _file_only_keys))
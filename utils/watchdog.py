@@ -0,0 +1,88 @@
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer
+from loguru import logger
+
+from utils.utils import get_data_path, log_to_file_only
+
+STALLS_LOG_FILE = "stalls.log"
+
+
+class StallWatchdog(QObject):
+    """
+    Детектор зависаний интерфейса
+
+    Таймер-пульс в GUI-потоке отмечает каждое срабатывание, отдельный поток следит за пульсом.
+    Если пульса нет дольше threshold_ms, поток снимает стек GUI-потока (и повторяет снимок, пока
+    зависание длится, не более MAX_SAMPLES раз). Когда цикл событий оживает, в stalls.log
+    пишется длительность зависания и снятые стеки
+    """
+
+    HEARTBEAT_MS = 100
+    MAX_SAMPLES = 5
+
+    def __init__(self, threshold_ms=500, path=None, parent=None):
+        super().__init__(parent)
+        self.threshold_s = threshold_ms / 1000
+        self.path = path or get_data_path(STALLS_LOG_FILE)
+        self.max_latency_ms = 0.0
+        self.stalls_count = 0
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(self.HEARTBEAT_MS)
+        self._heartbeat.timeout.connect(self._beat)
+
+        logger.add(
+            self.path,
+            format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {message}",
+            filter=lambda record: record["extra"].get("stall", False),
+            rotation="5 MB",
+            retention=3,
+            encoding="utf-8",
+        )
+        log_to_file_only("stall")
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._heartbeat.start()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._heartbeat.stop()
+        self._stop.set()
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            # Задержка цикла событий: на сколько пульс опоздал относительно интервала
+            latency_ms = max(0.0, (now - self._last_beat) * 1000 - self.HEARTBEAT_MS)
+            self._last_beat = now
+            samples, self._samples = self._samples, []
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if samples:
+            self.stalls_count += 1
+            logger.bind(stall=True).warning(
+                f"Интерфейс не отвечал {latency_ms + self.HEARTBEAT_MS:.0f} мс, снимки стека GUI-потока:\n"
+                + "\n".join(f"--- через {offset_ms:.0f} мс ---\n{stack}" for offset_ms, stack in samples))
+
+    def _watch(self):
+        interval = min(self.threshold_s, self.HEARTBEAT_MS / 1000) / 2
+        while not self._stop.wait(interval):
+            with self._lock:
+                blocked_s = time.monotonic() - self._last_beat
+                # Снимки на пороге и далее через каждый порог, пока GUI-поток стоит
+                due = len(self._samples) < self.MAX_SAMPLES and blocked_s >= self.threshold_s * (len(self._samples) + 1)
+                if due:
+                    frame = sys._current_frames().get(self._gui_thread_id)
+                    if frame is not None:
+                        self._samples.append((blocked_s * 1000, "".join(traceback.format_stack(frame))))